@@ -2,7 +2,7 @@ from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
 from flask_wtf.csrf import CSRFProtect
-from config import Config
+from config import Config, engine_options
 
 db = SQLAlchemy()
 login_manager = LoginManager()
@@ -11,6 +11,13 @@ csrf = CSRFProtect()
 def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
+    
+    # Worked out from the final URI, which subclasses and tests may override
+    if app.config.get('PRODUCTION_ENGINE_OPTIONS'):
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+            **engine_options(app.config['SQLALCHEMY_DATABASE_URI']),
+            **app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}),
+        }
 
     db.init_app(app)
     login_manager.init_app(app)
@@ -19,25 +26,64 @@ def create_app(config_class=Config):
     login_manager.login_view = 'auth.login'
     login_manager.login_message_category = 'info'
     
+    # SQLite connection pragmas (WAL, synchronous, busy timeout)
+    from app.utils.database import apply_sqlite_pragmas
+    apply_sqlite_pragmas(app)
+    
     # Import and register blueprints
     from app.routes.main import main
     from app.routes.auth import auth
     from app.routes.exercises import exercises
     from app.routes.workouts import workouts
     from app.routes.goals import goals
+    from app.routes.analytics import analytics
     
     app.register_blueprint(main)
     app.register_blueprint(auth)
     app.register_blueprint(exercises)
     app.register_blueprint(workouts)
     app.register_blueprint(goals)
+    app.register_blueprint(analytics)
+    
+    # CLI commands
+    from app.commands import register_commands
+    register_commands(app)
+    
+    # Exercise catalog cache
+    from app.utils.catalog import exercise_catalog
+    exercise_catalog.init_app(app)
+    
+    # Per-user dashboard cache
+    from app.routes.main import dashboard_cache
+    from app.models.workout import Workout
+    from app.models.goal import Goal
+    from app.utils.cache import invalidate_on_commit
+    dashboard_cache.init_app(app)
+    invalidate_on_commit(db.session, dashboard_cache, Workout, Goal)
+    
+    # Flask-Login user cache
+    from app.models.user import User, user_cache
+    user_cache.init_app(app)
+    invalidate_on_commit(db.session, user_cache, User, key='id')
+    
+    # Password verification (inline or process pool)
+    from app.utils.passwords import password_verifier
+    password_verifier.init_app(app)
+    
+    # Daily training rollups
+    from app.utils.rollup import register_rollup
+    register_rollup(db.session)
+    
+    # Per-user profile counters
+    from app.utils.counters import register_counters
+    register_counters(db.session)
+    
+    # Exercise search index
+    from app.utils.search import exercise_search
+    exercise_search.init_app(app)
     
-    # Create database tables
-    with app.app_context():
-        db.create_all()
-        
-        # Import and initialize seed data
-        from app.utils.seed_db import seed_exercises
-        seed_exercises()
+    # Request/SQL instrumentation and /metrics
+    from app.utils.metrics import request_metrics
+    request_metrics.init_app(app)
     
     return app
\ No newline at end of file
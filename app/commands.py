@@ -0,0 +1,158 @@
+import click
+
+
+def register_commands(app):
+    """
+    Attach the maintenance commands to the flask CLI
+    """
+    @app.cli.command('init-db')
+    def init_db():
+        """Create missing tables and search indexes and seed the built-in exercises."""
+        from app.utils.database import init_database
+        added = init_database()
+        click.echo(f'Database ready; added {added} exercises.')
+
+
+    @app.cli.command('migrate')
+    def migrate():
+        """Apply pending schema migrations (also part of init-db)."""
+        from app.utils.migrations import upgrade
+        applied = upgrade()
+        for id in applied:
+            click.echo(f'Applied {id}')
+        click.echo(f'{len(applied)} migrations applied.' if applied else 'Schema is up to date.')
+
+
+    @app.cli.command('import-profile')
+    @click.option('--top', type=int, default=15, help='How many modules and packages to list.')
+    def import_profile(top):
+        """Report where app startup time goes, from python -X importtime."""
+        from app.utils.profiling import profile_startup, by_package, own_time
+        entries = profile_startup()
+        total = sum(self_us for _, self_us, _, _ in entries)
+        click.echo(f'Imported {len(entries)} modules in {total / 1000:.0f} ms '
+                   f'({own_time(entries) / 1000:.0f} ms in app code).')
+        click.echo('\nBy package (self time):')
+        for package, self_us in by_package(entries)[:top]:
+            click.echo(f'  {self_us / 1000:8.1f} ms  {package}')
+        click.echo('\nSlowest modules (self time):')
+        for name, self_us, cumulative_us, _ in sorted(entries, key=lambda entry: entry[1], reverse=True)[:top]:
+            click.echo(f'  {self_us / 1000:8.1f} ms  {name} (cumulative {cumulative_us / 1000:.1f} ms)')
+
+
+    @app.cli.command('backfill-rollups')
+    @click.option('--user-id', 'user_ids', type=int, multiple=True, help='Only rebuild these users (repeatable).')
+    def backfill_rollups(user_ids):
+        """Rebuild the daily_stats rollup table from raw workouts."""
+        from app.utils.rollup import backfill
+        rows = backfill(list(user_ids) or None)
+        click.echo(f'Rebuilt {rows} daily_stats rows.')
+
+
+    @app.cli.command('recompute-goals')
+    @click.option('--user-id', 'user_ids', type=int, multiple=True, help='Only recompute these users (repeatable).')
+    def recompute_goals(user_ids):
+        """Recompute the progress of every metric-linked goal from raw workouts."""
+        from app.utils.progress import recompute_all
+        updated = recompute_all(list(user_ids) or None)
+        click.echo(f'Updated {updated} goals.')
+
+
+    @app.cli.command('reconcile-counters')
+    @click.option('--user-id', 'user_ids', type=int, multiple=True, help='Only check these users (repeatable).')
+    def reconcile_counters(user_ids):
+        """Recount the per-user profile counters and repair any that drifted."""
+        from app import db
+        from app.utils.counters import reconcile
+        checked, repaired = reconcile(db.session.connection(), list(user_ids) or None)
+        db.session.commit()
+        click.echo(f'Checked {checked} users, repaired {repaired}.')
+
+
+    @app.cli.command('import-workouts')
+    @click.argument('username')
+    @click.argument('source', type=click.File('r', encoding='utf-8'))
+    @click.option('--format', 'format', type=click.Choice(['ndjson', 'csv']), default=None,
+                  help='Input format (default: from the file extension).')
+    @click.option('--batch-size', type=int, default=None, help='Workouts per transaction.')
+    def import_workouts_command(username, source, format, batch_size):
+        """Bulk import a user's workouts from an NDJSON or CSV file ('-' for stdin)."""
+        from app.models.user import User
+        from app.utils.importer import import_workouts
+        user = User.query.filter_by(username=username).first()
+        if user is None:
+            raise click.ClickException(f'No user named {username}')
+        format = format or ('csv' if source.name.endswith('.csv') else 'ndjson')
+        summary = import_workouts(user.id, source, format=format,
+                                  batch_size=batch_size or app.config['IMPORT_BATCH_SIZE'])
+        for error in summary['errors']:
+            click.echo(f"line {error['line']}: {error['error']}", err=True)
+        click.echo(f"Imported {summary['imported']} workouts, {summary['failed']} failed.")
+
+    @app.cli.command('generate-data')
+    @click.option('--users', type=int, default=1000, show_default=True, help='Users to create.')
+    @click.option('--workouts-per-user', type=float, default=100, show_default=True,
+                  help='Mean workouts per user (log-normal).')
+    @click.option('--workout-spread', type=float, default=0.8, show_default=True,
+                  help='Sigma of the workouts-per-user distribution; 0 gives every user the mean.')
+    @click.option('--exercises-per-workout', type=float, default=5, show_default=True,
+                  help='Mean exercises per workout (uniform from 1).')
+    @click.option('--goals-per-user', type=float, default=4, show_default=True, help='Mean goals per user.')
+    @click.option('--history-days', type=int, default=730, show_default=True,
+                  help='Workouts are spread over this many days up to today.')
+    @click.option('--catalog', type=int, default=0, show_default=True,
+                  help='Synthetic exercises to add to the catalog first.')
+    @click.option('--popularity-skew', type=float, default=1.0, show_default=True,
+                  help='Zipf exponent of exercise popularity; 0 picks exercises uniformly.')
+    @click.option('--workers', type=int, default=1, show_default=True, help='Writer processes.')
+    @click.option('--chunk-size', type=int, default=500, show_default=True, help='Users per worker task.')
+    @click.option('--batch-size', type=int, default=10000, show_default=True, help='Rows per write.')
+    @click.option('--seed', type=int, default=1, show_default=True, help='Random seed.')
+    @click.option('--password', default='password', show_default=True,
+                  help='Password of every generated user (synthetic-<id>).')
+    @click.option('--skip-rollups', is_flag=True,
+                  help='Do not rebuild daily_stats, goal progress and profile counters afterwards.')
+    def generate_data(users, workouts_per_user, workout_spread, exercises_per_workout, goals_per_user,
+                      history_days, catalog, popularity_skew, workers, chunk_size, batch_size, seed, password,
+                      skip_rollups):
+        """Fill the database with synthetic users, workouts and goals for capacity planning."""
+        import time
+        from app.utils.catalog import exercise_catalog
+        from app.utils.seed_db import GenerationPlan, generate, seed_catalog
+
+        if catalog:
+            start = time.perf_counter()
+            added = seed_catalog(catalog, seed=seed)
+            exercise_catalog.invalidate()
+            click.echo(f'Added {added} catalog exercises in {time.perf_counter() - start:.1f}s.')
+
+        plan = GenerationPlan(users=users, workouts_per_user=workouts_per_user, workout_spread=workout_spread,
+                              exercises_per_workout=exercises_per_workout, goals_per_user=goals_per_user,
+                              history_days=history_days, popularity_skew=popularity_skew, seed=seed)
+
+        def progress(totals, elapsed):
+            rows = sum(totals.values())
+            click.echo(f'  {totals["users"]:>9} users  {rows:>11} rows  {rows / elapsed:>9.0f} rows/s')
+
+        try:
+            totals, elapsed = generate(plan, workers=workers, chunk_size=chunk_size,
+                                       batch_size=batch_size, password=password, progress=progress)
+        except ValueError as e:
+            raise click.ClickException(str(e))
+        for table, rows in totals.items():
+            click.echo(f'{table:18} {rows:>11} rows')
+        rows = sum(totals.values())
+        click.echo(f'{"total":18} {rows:>11} rows in {elapsed:.1f}s, {rows / elapsed:.0f} rows/s')
+
+        if not skip_rollups:
+            from app import db
+            from app.utils.counters import reconcile
+            from app.utils.progress import recompute_all
+            from app.utils.rollup import backfill
+            start = time.perf_counter()
+            days = backfill()
+            goals = recompute_all()
+            _, counters = reconcile(db.session.connection())
+            db.session.commit()
+            click.echo(f'Rebuilt {days} daily_stats rows, {goals} goals and {counters} user counters '
+                       f'in {time.perf_counter() - start:.1f}s.')
@@ -1,6 +1,7 @@
 from flask_wtf import FlaskForm
-from wtforms import StringField, TextAreaField, DateField, FloatField, SelectField, SubmitField
+from wtforms import StringField, TextAreaField, DateField, FloatField, IntegerField, SelectField, SubmitField
 from wtforms.validators import DataRequired, Optional, Length, NumberRange
+from app.models.goal import GOAL_METRICS
 
 class GoalForm(FlaskForm):
     name = StringField('Goal Name', validators=[DataRequired(), Length(min=3, max=100)])
@@ -12,6 +13,9 @@ class GoalForm(FlaskForm):
         ('habit', 'Habit'),
         ('other', 'Other')
     ])
+    metric = SelectField('Track Progress From', choices=[('', 'Manual updates')] + list(GOAL_METRICS.items()),
+                         validators=[Optional()])
+    exercise_id = IntegerField('Exercise', validators=[Optional()])
     target_value = FloatField('Target Value', validators=[DataRequired(), NumberRange(min=0)])
     current_value = FloatField('Current Value', validators=[Optional(), NumberRange(min=0)])
     unit = StringField('Unit', validators=[DataRequired(), Length(max=20)])
@@ -1,6 +1,14 @@
 from datetime import datetime
 from app import db
 
+# Metrics a goal's progress can be computed from (see app.utils.progress)
+GOAL_METRICS = {
+    'workout_count': 'Workouts logged',
+    'total_minutes': 'Total workout minutes',
+    'total_distance': 'Total distance (km)',
+    'max_weight': 'Heaviest weight lifted (kg)',
+}
+
 class Goal(db.Model):
     __tablename__ = 'goals'
     
@@ -15,8 +23,16 @@ class Goal(db.Model):
     start_date = db.Column(db.Date, default=datetime.utcnow().date)
     end_date = db.Column(db.Date)
     completed = db.Column(db.Boolean, default=False)
+    # When set, current_value is computed from workouts between start_date and end_date
+    metric = db.Column(db.String(30))  # One of GOAL_METRICS
+    exercise_id = db.Column(db.Integer, db.ForeignKey('exercises.id', ondelete='SET NULL'))  # Optional filter for distance/weight
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    # A user's goals, optionally only the active or completed ones
+    __table_args__ = (
+        db.Index('ix_goals_user_id_completed', user_id, completed),
+    )
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -30,6 +46,8 @@ class Goal(db.Model):
             'startDate': self.start_date.isoformat() if self.start_date else None,
             'endDate': self.end_date.isoformat() if self.end_date else None,
             'completed': self.completed,
+            'metric': self.metric,
+            'exerciseId': self.exercise_id,
             'createdAt': self.created_at.isoformat() if self.created_at else None,
             'progress': (self.current_value / self.target_value * 100) if self.target_value else 0
         }
@@ -0,0 +1,58 @@
+from app import db
+
+class DailyStats(db.Model):
+    """
+    Per-user, per-day training totals, maintained from workout writes (see app.utils.rollup)
+    """
+    __tablename__ = 'daily_stats'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    date = db.Column(db.Date, primary_key=True)
+    workout_count = db.Column(db.Integer, nullable=False, default=0)
+    duration = db.Column(db.Integer, nullable=False, default=0)  # In minutes
+    calories_burned = db.Column(db.Integer, nullable=False, default=0)
+    volume = db.Column(db.Float, nullable=False, default=0)  # Sum of sets x reps x weight (kg)
+    distance = db.Column(db.Float, nullable=False, default=0)  # In km
+    
+    def to_dict(self):
+        return {
+            'userId': self.user_id,
+            'date': self.date.isoformat() if self.date else None,
+            'workoutCount': self.workout_count,
+            'duration': self.duration,
+            'caloriesBurned': self.calories_burned,
+            'volume': self.volume,
+            'distance': self.distance
+        }
+    
+    def __repr__(self):
+        return f'<DailyStats {self.user_id} {self.date}>'
+
+class UserStats(db.Model):
+    """
+    Per-user totals for the profile page, adjusted by every workout and goal write
+    (see app.utils.counters). A missing row means not yet counted.
+    """
+    __tablename__ = 'user_stats'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    workout_count = db.Column(db.Integer, nullable=False, default=0)
+    active_goal_count = db.Column(db.Integer, nullable=False, default=0)
+    completed_goal_count = db.Column(db.Integer, nullable=False, default=0)
+    # Workout exercises logged, across all of the user's workouts
+    exercise_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # Bumped with every change to the user's workouts or goals; per-process caches of
+    # that data compare it to see writes made by other workers (see main.dashboard)
+    version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    
+    def to_dict(self):
+        return {
+            'userId': self.user_id,
+            'workoutCount': self.workout_count,
+            'activeGoalCount': self.active_goal_count,
+            'completedGoalCount': self.completed_goal_count,
+            'exerciseCount': self.exercise_count
+        }
+    
+    def __repr__(self):
+        return f'<UserStats {self.user_id}>'
@@ -1,12 +1,28 @@
 from datetime import datetime
 from flask_login import UserMixin
-from werkzeug.security import generate_password_hash, check_password_hash
 
 from app import db, login_manager
+from app.utils.cache import TTLCache
+from app.utils.passwords import hash_password, needs_rehash, password_verifier
+
+# Profile columns of recently seen users, so authenticated requests skip the user query.
+# Invalidated on commit when a user is updated or deleted (see create_app) in this
+# process; other worker processes may serve the old values for up to the 30s TTL.
+user_cache = TTLCache('user', maxsize=10000, ttl=30)
 
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    user_id = int(user_id)
+    values = user_cache.get(user_id)
+    if values is None:
+        row = db.session.execute(
+            db.select(*[getattr(User, field) for field in SessionUser.FIELDS]).where(User.id == user_id)
+        ).first()
+        if row is None:
+            return None
+        values = dict(row._mapping)
+        user_cache.set(user_id, values)
+    return SessionUser(values)
 
 class User(db.Model, UserMixin):
     __tablename__ = 'users'
@@ -22,6 +38,7 @@ class User(db.Model, UserMixin):
     # Relationships
     workouts = db.relationship('Workout', backref='user', lazy='dynamic', cascade='all, delete-orphan')
     goals = db.relationship('Goal', backref='user', lazy='dynamic', cascade='all, delete-orphan')
+    daily_stats = db.relationship('DailyStats', backref='user', lazy='dynamic', cascade='all, delete-orphan')
     
     def __init__(self, username, name, password, email=None):
         self.username = username
@@ -30,10 +47,14 @@ class User(db.Model, UserMixin):
         self.set_password(password)
     
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hash_password(password)
         
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        # May raise VerificationBusy when verification runs in the process pool
+        return password_verifier.verify(self.password_hash, password)
+    
+    def password_needs_rehash(self):
+        return needs_rehash(self.password_hash)
     
     def to_dict(self):
         return {
@@ -45,4 +66,20 @@ class User(db.Model, UserMixin):
         }
     
     def __repr__(self):
-        return f'<User {self.username}>'
\ No newline at end of file
+        return f'<User {self.username}>'
+
+
+class SessionUser(UserMixin):
+    """
+    The signed-in user as current_user: read-only profile columns from the user cache,
+    never the password hash. Load the User itself to change anything.
+    """
+    FIELDS = ('id', 'username', 'name', 'email', 'profile_picture', 'created_at')
+    
+    def __init__(self, values):
+        self.__dict__.update(values)
+    
+    to_dict = User.to_dict
+    
+    def __repr__(self):
+        return f'<User {self.username}>'
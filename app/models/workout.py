@@ -17,6 +17,24 @@ class Workout(db.Model):
     # Relationships
     workout_exercises = db.relationship('WorkoutExercise', backref='workout', lazy='dynamic', cascade='all, delete-orphan')
     
+    # Backs keyset pagination of a user's workouts, newest first
+    __table_args__ = (
+        db.Index('ix_workouts_user_id_date_id', user_id, date.desc(), id),
+    )
+    
+    # API field name -> column, used for field projection in list endpoints
+    API_FIELDS = {
+        'id': 'id',
+        'userId': 'user_id',
+        'name': 'name',
+        'date': 'date',
+        'duration': 'duration',
+        'type': 'type',
+        'notes': 'notes',
+        'caloriesBurned': 'calories_burned',
+        'createdAt': 'created_at'
+    }
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -48,6 +66,13 @@ class WorkoutExercise(db.Model):
     notes = db.Column(db.Text)
     order = db.Column(db.Integer, default=0)
     
+    # A workout's exercises in display order; exercise_id backs analytics filters and
+    # the delete cascade from exercises. Added to existing databases by migration 0002.
+    __table_args__ = (
+        db.Index('ix_workout_exercises_workout_id_order', workout_id, order),
+        db.Index('ix_workout_exercises_exercise_id', exercise_id),
+    )
+    
     def to_dict(self):
         return {
             'id': self.id,
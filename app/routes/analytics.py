@@ -0,0 +1,160 @@
+from flask import Blueprint, jsonify, request
+from flask_login import login_required, current_user
+from app import db
+from app.models.workout import Workout, WorkoutExercise
+from app.models.stats import DailyStats
+from sqlalchemy import func, literal_column, cast, or_
+from datetime import datetime, date
+
+analytics = Blueprint('analytics', __name__)
+
+BUCKETS = ('day', 'week', 'month')
+
+def bucket_start(column, bucket):
+    """
+    SQL expression truncating a date column to the start of its day/week (Monday)/month
+    """
+    if bucket == 'day':
+        return column
+    if db.engine.dialect.name == 'sqlite':
+        if bucket == 'week':
+            return func.date(column, 'weekday 0', '-6 days')
+        return func.date(column, 'start of month')
+    return cast(func.date_trunc(bucket, column), db.Date)
+
+def parse_range():
+    """
+    The bucket and optional start/end dates from the query string
+    """
+    bucket = request.args.get('bucket', 'week')
+    if bucket not in BUCKETS:
+        raise ValueError(f'bucket must be one of {", ".join(BUCKETS)}')
+    start = datetime.fromisoformat(request.args['start']).date() if request.args.get('start') else None
+    end = datetime.fromisoformat(request.args['end']).date() if request.args.get('end') else None
+    return bucket, start, end
+
+def iso(value):
+    return value.isoformat() if isinstance(value, date) else value
+
+@analytics.route('/api/analytics/volume')
+@login_required
+def api_volume():
+    try:
+        bucket, start, end = parse_range()
+        exercise_id = int(request.args['exerciseId']) if request.args.get('exerciseId') else None
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    period = bucket_start(Workout.date, bucket).label('period')
+    query = db.session.query(
+        period,
+        func.count(func.distinct(Workout.id)).label('workouts'),
+        func.coalesce(func.sum(WorkoutExercise.sets), 0).label('sets'),
+        func.coalesce(func.sum(WorkoutExercise.sets * WorkoutExercise.reps), 0).label('reps'),
+        func.coalesce(func.sum(WorkoutExercise.sets * WorkoutExercise.reps * WorkoutExercise.weight), 0).label('volume'),
+        func.coalesce(func.sum(WorkoutExercise.distance), 0).label('distance')
+    ).join(WorkoutExercise, WorkoutExercise.workout_id == Workout.id) \
+     .filter(Workout.user_id == current_user.id)
+
+    if exercise_id:
+        query = query.filter(WorkoutExercise.exercise_id == exercise_id)
+    if start:
+        query = query.filter(Workout.date >= start)
+    if end:
+        query = query.filter(Workout.date <= end)
+
+    rows = query.group_by(literal_column('period')).order_by(literal_column('period')).all()
+
+    return jsonify([{
+        'period': iso(row.period),
+        'workouts': row.workouts,
+        'sets': row.sets,
+        'reps': row.reps,
+        'volume': row.volume,
+        'distance': row.distance
+    } for row in rows]), 200
+
+@analytics.route('/api/analytics/records')
+@login_required
+def api_records():
+    """
+    Personal records per exercise: heaviest weight, best estimated 1RM (Epley),
+    biggest single-entry volume and longest distance, each with the date it was set
+    """
+    metrics = {
+        'maxWeight': WorkoutExercise.weight,
+        'estimatedOneRepMax': WorkoutExercise.weight * (1 + WorkoutExercise.reps / 30.0),
+        'maxVolume': WorkoutExercise.sets * WorkoutExercise.reps * WorkoutExercise.weight,
+        'maxDistance': WorkoutExercise.distance,
+    }
+
+    columns = [WorkoutExercise.exercise_id, Workout.date]
+    for name, expression in metrics.items():
+        columns.append(expression.label(name))
+        # Rank 1 is the record; NULL values sort after every real value
+        columns.append(func.row_number().over(
+            partition_by=WorkoutExercise.exercise_id,
+            order_by=(expression.is_(None), expression.desc(), Workout.date)
+        ).label(f'{name}_rank'))
+
+    ranked = db.session.query(*columns) \
+        .join(Workout, Workout.id == WorkoutExercise.workout_id) \
+        .filter(Workout.user_id == current_user.id)
+    if request.args.get('exerciseId'):
+        try:
+            ranked = ranked.filter(WorkoutExercise.exercise_id == int(request.args['exerciseId']))
+        except ValueError:
+            return jsonify({'error': 'Invalid exerciseId'}), 400
+    ranked = ranked.subquery()
+
+    rows = db.session.query(ranked).filter(
+        or_(*[ranked.c[f'{name}_rank'] == 1 for name in metrics])
+    ).all()
+
+    records = {}
+    for row in rows:
+        record = records.setdefault(row.exercise_id, {'exerciseId': row.exercise_id})
+        for name in metrics:
+            if getattr(row, f'{name}_rank') == 1 and getattr(row, name) is not None:
+                record[name] = {'value': getattr(row, name), 'date': iso(row.date)}
+
+    return jsonify(sorted(records.values(), key=lambda record: record['exerciseId'])), 200
+
+@analytics.route('/api/analytics/trends')
+@login_required
+def api_trends():
+    """
+    Workout frequency, time, calories, volume and distance per bucket, from the daily rollups
+    """
+    try:
+        bucket, start, end = parse_range()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    period = bucket_start(DailyStats.date, bucket).label('period')
+    query = db.session.query(
+        period,
+        func.sum(DailyStats.workout_count).label('workouts'),
+        func.count(DailyStats.date).label('active_days'),
+        func.sum(DailyStats.duration).label('duration'),
+        func.sum(DailyStats.calories_burned).label('calories'),
+        func.sum(DailyStats.volume).label('volume'),
+        func.sum(DailyStats.distance).label('distance')
+    ).filter(DailyStats.user_id == current_user.id)
+
+    if start:
+        query = query.filter(DailyStats.date >= start)
+    if end:
+        query = query.filter(DailyStats.date <= end)
+
+    rows = query.group_by(literal_column('period')).order_by(literal_column('period')).all()
+
+    return jsonify([{
+        'period': iso(row.period),
+        'workouts': row.workouts,
+        'activeDays': row.active_days,
+        'duration': row.duration,
+        'caloriesBurned': row.calories,
+        'volume': row.volume,
+        'distance': row.distance
+    } for row in rows]), 200
\ No newline at end of file
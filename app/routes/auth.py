@@ -3,6 +3,7 @@ from flask_login import login_user, logout_user, current_user, login_required
 from app import db
 from app.forms.auth import LoginForm, RegisterForm
 from app.models.user import User
+from app.utils.passwords import VerificationBusy
 
 auth = Blueprint('auth', __name__)
 
@@ -14,7 +15,15 @@ def login():
     form = LoginForm()
     if form.validate_on_submit():
         user = User.query.filter_by(username=form.username.data).first()
-        if user and user.check_password(form.password.data):
+        try:
+            valid = user is not None and user.check_password(form.password.data)
+        except VerificationBusy:
+            flash('Too many sign-ins right now. Please try again in a moment.', 'warning')
+            return render_template('auth/login.html', form=form), 503
+        if valid:
+            if user.password_needs_rehash():
+                user.set_password(form.password.data)
+                db.session.commit()
             login_user(user)
             next_page = request.args.get('next')
             return redirect(next_page or url_for('main.dashboard'))
@@ -63,7 +72,15 @@ def api_login():
         return jsonify({'error': 'Username and password are required'}), 400
     
     user = User.query.filter_by(username=username).first()
-    if user and user.check_password(password):
+    try:
+        valid = user is not None and user.check_password(password)
+    except VerificationBusy:
+        return jsonify({'error': 'Too many sign-ins in progress, try again shortly'}), 503, {'Retry-After': '1'}
+    if valid:
+        if user.password_needs_rehash():
+            # Upgrade hashes made with old parameters while the password is at hand
+            user.set_password(password)
+            db.session.commit()
         login_user(user)
         return jsonify(user.to_dict()), 200
     
@@ -1,50 +1,107 @@
-from flask import Blueprint, render_template, jsonify, request
+from flask import Blueprint, render_template, jsonify, request, abort, current_app
 from flask_login import login_required, current_user
 from app import db
 from app.models.exercise import Exercise
+from app.utils.catalog import exercise_catalog, split_tags, TAG_FACETS
+from app.utils.search import exercise_search
+import gzip
+import hashlib
+
+try:
+    import brotli
+except ImportError:  # optional, br variant is skipped without it
+    brotli = None
 
 exercises = Blueprint('exercises', __name__)
 
 @exercises.route('/exercises')
 @login_required
 def exercise_list():
-    all_exercises = Exercise.query.all()
+    all_exercises = exercise_catalog.all()
     
     # Get unique muscle groups for filtering
-    muscle_groups = set()
-    for exercise in all_exercises:
-        if exercise.muscle_groups:
-            for group in exercise.muscle_groups.split(', '):
-                muscle_groups.add(group)
+    muscle_groups = exercise_catalog.tags('muscle')
     
-    return render_template('exercises/list.html', exercises=all_exercises, muscle_groups=sorted(muscle_groups))
+    return render_template('exercises/list.html', exercises=all_exercises, muscle_groups=muscle_groups)
 
 @exercises.route('/exercises/<int:exercise_id>')
 @login_required
 def exercise_detail(exercise_id):
-    exercise = Exercise.query.get_or_404(exercise_id)
+    exercise = exercise_catalog.get(exercise_id) or abort(404)
     
     # Find related exercises with similar muscle groups
     related_exercises = []
     if exercise.muscle_groups:
-        primary_muscle = exercise.muscle_groups.split(', ')[0]
-        related_exercises = Exercise.query.filter(
-            Exercise.id != exercise.id,
-            Exercise.muscle_groups.like(f'%{primary_muscle}%')
-        ).limit(3).all()
+        primary_muscle = split_tags(exercise.muscle_groups)[0]
+        related_exercises = [
+            related for related in exercise_catalog.filter(muscle=primary_muscle)
+            if related.id != exercise.id
+        ][:3]
     
     return render_template('exercises/detail.html', exercise=exercise, related_exercises=related_exercises)
 
 # API routes
 
+def encode_catalog(exercises):
+    """
+    Pre-encoded /api/exercises body in each supported content encoding, each with its
+    own strong ETag (a strong validator must identify one representation)
+    """
+    body = jsonify([exercise.to_dict() for exercise in exercises]).get_data()
+    digest = hashlib.sha256(body).hexdigest()[:32]
+    variants = {'gzip': gzip.compress(body, compresslevel=9)}
+    if brotli:
+        variants['br'] = brotli.compress(body)
+    return {
+        'identity': (body, digest),
+        **{encoding: (data, f'{digest}-{encoding}') for encoding, data in variants.items()}
+    }
+
 @exercises.route('/api/exercises')
 def api_exercises_list():
-    exercises = Exercise.query.all()
-    return jsonify([exercise.to_dict() for exercise in exercises]), 200
+    # Filtered listings, e.g. ?muscle=Back&equipment=Barbell&difficulty=Beginner
+    facets = {facet: request.args[facet] for facet in TAG_FACETS if request.args.get(facet)}
+    if facets:
+        return jsonify([exercise.to_dict() for exercise in exercise_catalog.filter(**facets)]), 200
+    
+    payload = exercise_catalog.derived('api_payload', encode_catalog)
+    encoding = next((encoding for encoding in ('br', 'gzip')
+                     if encoding in payload and request.accept_encodings[encoding]), 'identity')
+    body, etag = payload[encoding]
+    
+    response = current_app.response_class(mimetype='application/json')
+    response.set_etag(etag)
+    response.vary.add('Accept-Encoding')
+    if request.if_none_match.contains_weak(etag):
+        response.status_code = 304
+        return response
+    
+    response.set_data(body)
+    if encoding != 'identity':
+        response.headers['Content-Encoding'] = encoding
+    return response
+
+@exercises.route('/api/exercises/search')
+def api_search_exercises():
+    query = request.args.get('q', '')
+    try:
+        page = max(1, int(request.args.get('page', 1)))
+        per_page = max(1, min(int(request.args.get('perPage', 20)), 100))
+    except ValueError:
+        return jsonify({'error': 'Invalid page'}), 400
+    
+    total, results = exercise_search.search(query, page=page, per_page=per_page)
+    
+    return jsonify({
+        'results': [exercise.to_dict() for exercise in results],
+        'total': total,
+        'page': page,
+        'perPage': per_page
+    }), 200
 
 @exercises.route('/api/exercises/<int:exercise_id>')
 def api_exercise_detail(exercise_id):
-    exercise = Exercise.query.get_or_404(exercise_id)
+    exercise = exercise_catalog.get(exercise_id) or abort(404)
     return jsonify(exercise.to_dict()), 200
 
 @exercises.route('/api/exercises', methods=['POST'])
@@ -66,6 +123,7 @@ def api_create_exercise():
     
     db.session.add(new_exercise)
     db.session.commit()
+    exercise_catalog.invalidate()
     
     return jsonify(new_exercise.to_dict()), 201
 
@@ -94,6 +152,7 @@ def api_update_exercise(exercise_id):
         exercise.instructions = data['instructions']
     
     db.session.commit()
+    exercise_catalog.invalidate()
     
     return jsonify(exercise.to_dict()), 200
 
@@ -104,5 +163,6 @@ def api_delete_exercise(exercise_id):
     
     db.session.delete(exercise)
     db.session.commit()
+    exercise_catalog.invalidate()
     
     return jsonify({'message': 'Exercise deleted successfully'}), 200
\ No newline at end of file
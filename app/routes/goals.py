@@ -1,8 +1,11 @@
 from flask import Blueprint, render_template, redirect, url_for, request, jsonify
 from flask_login import login_required, current_user
 from app import db
-from app.models.goal import Goal
+from app.models.goal import Goal, GOAL_METRICS
 from app.forms.goal import GoalForm
+from app.utils.catalog import exercise_catalog
+from app.utils.progress import refresh_goals
+from app.utils.validation import number
 from datetime import datetime
 
 goals = Blueprint('goals', __name__)
@@ -16,6 +19,27 @@ def goal_list():
     
     return render_template('goals/list.html', active_goals=active_goals, completed_goals=completed_goals)
 
+def sync_progress(goal):
+    """
+    Compute a metric-linked goal's progress from the workouts already logged
+    (later workout writes keep it up to date, see app.utils.rollup)
+    """
+    if goal.metric:
+        db.session.flush()
+        refresh_goals(db.session.connection(), Goal.id == goal.id)
+
+def parse_metric(data):
+    """
+    The metric and exercise id from an API payload, or ValueError
+    """
+    metric = data.get('metric') or None
+    if metric is not None and metric not in GOAL_METRICS:
+        raise ValueError(f'metric must be one of {", ".join(GOAL_METRICS)}')
+    exercise_id = number(data.get('exerciseId'), int, 'exerciseId')
+    if exercise_id is not None and exercise_catalog.get(exercise_id) is None:
+        raise ValueError('Unknown exerciseId')
+    return metric, exercise_id
+
 @goals.route('/goals/create', methods=['GET', 'POST'])
 @login_required
 def create_goal():
@@ -31,14 +55,17 @@ def create_goal():
             current_value=form.current_value.data or 0,
             unit=form.unit.data,
             start_date=form.start_date.data,
-            end_date=form.end_date.data
+            end_date=form.end_date.data,
+            metric=form.metric.data or None,
+            exercise_id=form.exercise_id.data
         )
         
         db.session.add(goal)
+        sync_progress(goal)
         db.session.commit()
         return redirect(url_for('goals.goal_list'))
     
-    return render_template('goals/create.html', form=form)
+    return render_template('goals/create.html', form=form, exercises=exercise_catalog.all())
 
 @goals.route('/goals/<int:goal_id>/edit', methods=['GET', 'POST'])
 @login_required
@@ -61,11 +88,17 @@ def edit_goal(goal_id):
         goal.start_date = form.start_date.data
         goal.end_date = form.end_date.data
         goal.completed = form.current_value.data >= form.target_value.data if form.current_value.data else False
+        goal.metric = form.metric.data or None
+        goal.exercise_id = form.exercise_id.data
+        if goal.metric:
+            # Progress and completion come from the workouts, not the form
+            goal.completed = False
         
+        sync_progress(goal)
         db.session.commit()
         return redirect(url_for('goals.goal_list'))
     
-    return render_template('goals/edit.html', form=form, goal=goal)
+    return render_template('goals/edit.html', form=form, goal=goal, exercises=exercise_catalog.all())
 
 @goals.route('/goals/<int:goal_id>/toggle', methods=['POST'])
 @login_required
@@ -76,8 +109,10 @@ def toggle_goal_completion(goal_id):
     if goal.user_id != current_user.id:
         return redirect(url_for('goals.goal_list'))
     
-    goal.completed = not goal.completed
-    db.session.commit()
+    # Metric-linked goals are completed by their progress alone
+    if not goal.metric:
+        goal.completed = not goal.completed
+        db.session.commit()
     
     return redirect(url_for('goals.goal_list'))
 
@@ -117,6 +152,11 @@ def api_create_goal():
     if not data:
         return jsonify({'error': 'Invalid data'}), 400
     
+    try:
+        metric, exercise_id = parse_metric(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
     goal = Goal(
         user_id=current_user.id,
         name=data.get('name'),
@@ -127,10 +167,13 @@ def api_create_goal():
         unit=data.get('unit'),
         start_date=datetime.fromisoformat(data.get('startDate')).date() if data.get('startDate') else datetime.utcnow().date(),
         end_date=datetime.fromisoformat(data.get('endDate')).date() if data.get('endDate') else None,
-        completed=data.get('completed', False)
+        completed=data.get('completed', False),
+        metric=metric,
+        exercise_id=exercise_id
     )
     
     db.session.add(goal)
+    sync_progress(goal)
     db.session.commit()
     
     return jsonify(goal.to_dict()), 201
@@ -148,6 +191,14 @@ def api_update_goal(goal_id):
     if not data:
         return jsonify({'error': 'Invalid data'}), 400
     
+    try:
+        metric, exercise_id = parse_metric({
+            'metric': data.get('metric', goal.metric),
+            'exerciseId': data.get('exerciseId', goal.exercise_id)
+        })
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
     if 'name' in data:
         goal.name = data['name']
     if 'description' in data:
@@ -169,7 +220,9 @@ def api_update_goal(goal_id):
         goal.end_date = datetime.fromisoformat(data['endDate']).date()
     if 'completed' in data:
         goal.completed = data['completed']
+    goal.metric, goal.exercise_id = metric, exercise_id
     
+    sync_progress(goal)
     db.session.commit()
     
     return jsonify(goal.to_dict()), 200
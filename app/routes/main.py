@@ -1,13 +1,23 @@
-from flask import Blueprint, render_template, redirect, url_for
+from flask import Blueprint, current_app, render_template, redirect, url_for, request, jsonify, stream_with_context
 from flask_login import login_required, current_user
+from app import db
 from app.models.workout import Workout
 from app.models.goal import Goal
-from app.models.exercise import Exercise
-from sqlalchemy import func
+from app.models.stats import DailyStats, UserStats
+from app.utils.catalog import exercise_catalog
+from app.utils.cache import TTLCache
+from app.utils.counters import reconcile
+from app.utils.exporter import export_ndjson, export_csv, export_columnar
+from sqlalchemy import func, true
 from datetime import datetime, timedelta
 
 main = Blueprint('main', __name__)
 
+# Per-user dashboard data with the user_stats version it was built at. Dropped on commit
+# by the worker that changed the user's workouts or goals; other workers see the bumped
+# version on the next read.
+dashboard_cache = TTLCache('dashboard', maxsize=1024, ttl=300)
+
 @main.route('/')
 def index():
     if current_user.is_authenticated:
@@ -17,63 +27,137 @@ def index():
 @main.route('/dashboard')
 @login_required
 def dashboard():
-    # Get recent workouts
-    recent_workouts = Workout.query.filter_by(user_id=current_user.id).order_by(Workout.date.desc()).limit(3).all()
-    
-    # Get active goals
-    active_goals = Goal.query.filter_by(user_id=current_user.id, completed=False).limit(3).all()
-    
-    # Get weekly stats
     today = datetime.utcnow().date()
     start_of_week = today - timedelta(days=today.weekday())
+    
+    context = dashboard_cache.get(current_user.id)
+    if context is None or context['start_of_week'] != start_of_week \
+            or context['version'] != stats_version(current_user.id):
+        context = dashboard_context(current_user.id, start_of_week)
+        if context['version'] is not None:
+            dashboard_cache.set(current_user.id, context)
+        else:
+            # Not counted yet, so writes cannot bump a version: count now, cache next time
+            reconcile(db.session.connection(), [current_user.id])
+            db.session.commit()
+    
+    # Get some featured exercises
+    featured_exercises = exercise_catalog.all()[:6]
+    
+    return render_template(
+        'dashboard.html',
+        recent_workouts=context['recent_workouts'],
+        goals=context['goals'],
+        weekly_summary=context['weekly_summary'],
+        featured_exercises=featured_exercises
+    )
+
+def stats_version(user_id):
+    return db.session.scalar(db.select(UserStats.version).where(UserStats.user_id == user_id))
+
+def dashboard_context(user_id, start_of_week):
+    """
+    Weekly totals, recent workouts and active goals for the dashboard in a single query,
+    with the user_stats version they were read at (None when the user is not counted yet).
+    The weekly aggregate row is left joined with the (at most 3) recent workouts and
+    (at most 3) active goals, so the result has at most 9 rows.
+    """
     end_of_week = start_of_week + timedelta(days=6)
     
-    weekly_workouts = Workout.query.filter(
-        Workout.user_id == current_user.id,
-        Workout.date >= start_of_week,
-        Workout.date <= end_of_week
-    ).all()
+    weekly = db.session.query(
+        func.coalesce(func.sum(DailyStats.workout_count), 0).label('workouts'),
+        func.coalesce(func.sum(DailyStats.duration), 0).label('duration'),
+        func.coalesce(func.sum(DailyStats.calories_burned), 0).label('calories'),
+        db.select(UserStats.version).where(UserStats.user_id == user_id).scalar_subquery().label('version')
+    ).filter(
+        DailyStats.user_id == user_id,
+        DailyStats.date >= start_of_week,
+        DailyStats.date <= end_of_week
+    ).subquery()
+    
+    recent = db.session.query(
+        Workout.id, Workout.name, Workout.date, Workout.type, Workout.duration
+    ).filter(Workout.user_id == user_id).order_by(Workout.date.desc()).limit(3).subquery()
+    
+    goals = db.session.query(
+        Goal.id, Goal.name, Goal.type, Goal.completed, Goal.current_value, Goal.target_value, Goal.unit
+    ).filter(Goal.user_id == user_id, Goal.completed == False).limit(3).subquery()
     
-    total_workouts = len(weekly_workouts)
-    total_duration = sum(w.duration or 0 for w in weekly_workouts)
-    total_calories = sum(w.calories_burned or 0 for w in weekly_workouts)
+    rows = db.session.query(weekly, recent, goals) \
+        .select_from(weekly) \
+        .outerjoin(recent, true()) \
+        .outerjoin(goals, true()) \
+        .all()
+    
+    recent_workouts = {}
+    active_goals = {}
+    for row in rows:
+        if row[4] is not None:
+            recent_workouts.setdefault(row[4], dict(zip(recent.c.keys(), row[4:9])))
+        if row[9] is not None:
+            active_goals.setdefault(row[9], dict(zip(goals.c.keys(), row[9:])))
+    
+    total_workouts, total_duration, total_calories, version = rows[0][:4]
     
     # Format duration for display (e.g., "2h 30m")
     hours = total_duration // 60
     minutes = total_duration % 60
     formatted_duration = f"{hours}h {minutes}m" if hours > 0 else f"{minutes}m"
     
-    weekly_summary = {
-        'workouts': total_workouts,
-        'totalTime': formatted_duration,
-        'calories': total_calories
+    return {
+        'start_of_week': start_of_week,
+        'version': version,
+        'recent_workouts': sorted(recent_workouts.values(), key=lambda w: w['date'], reverse=True),
+        'goals': list(active_goals.values()),
+        'weekly_summary': {
+            'workouts': total_workouts,
+            'totalTime': formatted_duration,
+            'calories': total_calories
+        }
     }
-    
-    # Get some featured exercises
-    featured_exercises = Exercise.query.limit(6).all()
-    
-    return render_template(
-        'dashboard.html',
-        recent_workouts=recent_workouts,
-        goals=active_goals,
-        weekly_summary=weekly_summary,
-        featured_exercises=featured_exercises
-    )
 
 @main.route('/profile')
 @login_required
 def profile():
-    # Get workout count
-    workout_count = Workout.query.filter_by(user_id=current_user.id).count()
+    # Counters maintained by the workout and goal writes (one primary key lookup)
+    stats = db.session.get(UserStats, current_user.id)
+    if stats is None:
+        # First visit: count once, later writes keep the row up to date
+        reconcile(db.session.connection(), [current_user.id])
+        db.session.commit()
+        stats = db.session.get(UserStats, current_user.id)
     
-    # Get goal counts
-    active_goals_count = Goal.query.filter_by(user_id=current_user.id, completed=False).count()
-    completed_goals_count = Goal.query.filter_by(user_id=current_user.id, completed=True).count()
+    # Account pages the template links to, shown only once their routes exist
+    account_actions = {
+        action for action in ('update_profile', 'change_password', 'update_email', 'delete_account')
+        if f'auth.{action}' in current_app.view_functions
+    }
     
-    return render_template(
-        'profile.html',
-        user=current_user,
-        workout_count=workout_count,
-        active_goals_count=active_goals_count,
-        completed_goals_count=completed_goals_count
-    )
\ No newline at end of file
+    return render_template('profile.html', user=current_user, stats=stats, account_actions=account_actions)
+
+@main.route('/api/export')
+@login_required
+def api_export():
+    """
+    Streams the user's full history: ?format=ndjson (default), csv (&resource=workouts|goals)
+    or columnar (compact binary, see app.utils.exporter)
+    """
+    format = request.args.get('format', 'ndjson')
+    user_id = current_user.id
+    
+    if format == 'ndjson':
+        body, mimetype, extension = export_ndjson(user_id), 'application/x-ndjson', 'ndjson'
+    elif format == 'csv':
+        resource = request.args.get('resource', 'workouts')
+        if resource not in ('workouts', 'goals'):
+            return jsonify({'error': 'resource must be workouts or goals'}), 400
+        body, mimetype, extension = export_csv(user_id, resource), 'text/csv', 'csv'
+    elif format == 'columnar':
+        body, mimetype, extension = export_columnar(user_id), 'application/octet-stream', 'ftcol'
+    else:
+        return jsonify({'error': 'format must be ndjson, csv or columnar'}), 400
+    
+    return stream_with_context(body), 200, {
+        'Content-Type': mimetype,
+        'Content-Disposition': f'attachment; filename=fittrack-export.{extension}'
+    }
\ No newline at end of file
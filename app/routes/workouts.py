@@ -1,10 +1,20 @@
-from flask import Blueprint, render_template, redirect, url_for, request, jsonify
+from flask import Blueprint, render_template, redirect, url_for, request, jsonify, current_app
 from flask_login import login_required, current_user
 from app import db
 from app.models.workout import Workout, WorkoutExercise
 from app.models.exercise import Exercise
 from app.forms.workout import WorkoutForm
-from datetime import datetime
+from app.utils.catalog import exercise_catalog
+from app.utils.counters import adjust
+from app.utils.importer import import_workouts
+from app.utils.rollup import refresh_days, deferred
+from app.utils.validation import number
+from app.routes.main import dashboard_cache
+from sqlalchemy import func, or_, and_, insert, update, delete
+from sqlalchemy.orm import joinedload
+from datetime import datetime, date
+import base64
+import io
 
 workouts = Blueprint('workouts', __name__)
 
@@ -12,13 +22,43 @@ workouts = Blueprint('workouts', __name__)
 @login_required
 def workout_list():
     workouts = Workout.query.filter_by(user_id=current_user.id).order_by(Workout.date.desc()).all()
-    return render_template('workouts/list.html', workouts=workouts)
+    summaries = exercise_summaries(current_user.id)
+    return render_template('workouts/list.html', workouts=workouts, summaries=summaries)
+
+def exercise_summaries(user_id, preview=3):
+    """
+    Exercise count and the first few exercise names for every workout of a user,
+    fetched in a single windowed query instead of lazy loads per workout
+    """
+    ranked = db.session.query(
+        WorkoutExercise.workout_id.label('workout_id'),
+        Exercise.name.label('name'),
+        func.row_number().over(
+            partition_by=WorkoutExercise.workout_id,
+            order_by=(WorkoutExercise.order, WorkoutExercise.id)
+        ).label('position'),
+        func.count().over(partition_by=WorkoutExercise.workout_id).label('total')
+    ).join(Exercise, Exercise.id == WorkoutExercise.exercise_id) \
+     .join(Workout, Workout.id == WorkoutExercise.workout_id) \
+     .filter(Workout.user_id == user_id) \
+     .subquery()
+    
+    rows = db.session.query(ranked.c.workout_id, ranked.c.name, ranked.c.total) \
+        .filter(ranked.c.position <= preview) \
+        .order_by(ranked.c.workout_id, ranked.c.position) \
+        .all()
+    
+    summaries = {}
+    for workout_id, name, total in rows:
+        summary = summaries.setdefault(workout_id, {'exercise_count': total, 'exercise_names': []})
+        summary['exercise_names'].append(name)
+    return summaries
 
 @workouts.route('/workouts/create', methods=['GET', 'POST'])
 @login_required
 def create_workout():
     form = WorkoutForm()
-    exercises = Exercise.query.all()
+    exercises = exercise_catalog.all()
     
     if form.validate_on_submit():
         workout = Workout(
@@ -31,14 +71,11 @@ def create_workout():
             calories_burned=form.calories_burned.data
         )
         
-        db.session.add(workout)
-        db.session.commit()
-        
         # Process workout exercises
+        exercise_rows = []
         for exercise_form in form.exercises.data:
             if exercise_form.get('exercise_id'):
-                workout_exercise = WorkoutExercise(
-                    workout_id=workout.id,
+                exercise_rows.append(dict(
                     exercise_id=exercise_form.get('exercise_id'),
                     sets=exercise_form.get('sets'),
                     reps=exercise_form.get('reps'),
@@ -47,14 +84,31 @@ def create_workout():
                     distance=exercise_form.get('distance'),
                     notes=exercise_form.get('notes'),
                     order=exercise_form.get('order', 0)
-                )
-                db.session.add(workout_exercise)
+                ))
         
-        db.session.commit()
+        save_workout(workout, exercise_rows)
         return redirect(url_for('workouts.workout_detail', workout_id=workout.id))
     
     return render_template('workouts/create.html', form=form, exercises=exercises)
 
+def save_workout(workout, exercise_rows):
+    """
+    Persist a new workout and its exercises atomically: the workout is flushed to get
+    its id, the exercises go in as one executemany INSERT, and everything commits once
+    """
+    db.session.add(workout)
+    # The day's rollup is refreshed once below, after the exercises are in
+    with deferred(db.session):
+        db.session.flush()
+    
+    if exercise_rows:
+        db.session.execute(insert(WorkoutExercise), [dict(row, workout_id=workout.id) for row in exercise_rows])
+        # Bulk inserts bypass the session listeners, so adjust the counters here
+        adjust(db.session.connection(), {workout.user_id: {'exercise_count': len(exercise_rows)}})
+    refresh_days(db.session.connection(), {(workout.user_id, workout.date)})
+    
+    db.session.commit()
+
 @workouts.route('/workouts/<int:workout_id>')
 @login_required
 def workout_detail(workout_id):
@@ -65,7 +119,10 @@ def workout_detail(workout_id):
         return redirect(url_for('workouts.workout_list'))
     
     # Get workout exercises with exercise details
-    workout_exercises = WorkoutExercise.query.filter_by(workout_id=workout.id).order_by(WorkoutExercise.order).all()
+    workout_exercises = WorkoutExercise.query.options(joinedload(WorkoutExercise.exercise)) \
+        .filter_by(workout_id=workout.id) \
+        .order_by(WorkoutExercise.order, WorkoutExercise.id) \
+        .all()
     
     return render_template('workouts/detail.html', workout=workout, workout_exercises=workout_exercises)
 
@@ -79,7 +136,7 @@ def edit_workout(workout_id):
         return redirect(url_for('workouts.workout_list'))
     
     form = WorkoutForm(obj=workout)
-    exercises = Exercise.query.all()
+    exercises = exercise_catalog.all()
     
     if form.validate_on_submit():
         workout.name = form.name.data
@@ -97,11 +154,87 @@ def edit_workout(workout_id):
 
 # API routes
 
+def encode_cursor(workout_date, workout_id):
+    # An undated workout has an empty date part
+    raw = f'{workout_date.isoformat() if workout_date else ""}|{workout_id}'.encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    padded = cursor + '=' * (-len(cursor) % 4)
+    workout_date, workout_id = base64.urlsafe_b64decode(padded).decode().split('|')
+    return (date.fromisoformat(workout_date) if workout_date else None), int(workout_id)
+
+def paginated_workouts(user_id):
+    """
+    One page of a user's workouts, newest first, using (date, id) keyset pagination;
+    workouts without a date follow the dated ones, by id.
+    Supports ?limit=, ?cursor= and ?fields= (comma separated API field names).
+    Returns the response tuple; the next page's cursor is sent in the X-Next-Cursor header.
+    """
+    try:
+        limit = int(request.args.get('limit', current_app.config['WORKOUTS_PAGE_SIZE']))
+    except ValueError:
+        return jsonify({'error': 'Invalid limit'}), 400
+    limit = max(1, min(limit, current_app.config['WORKOUTS_MAX_PAGE_SIZE']))
+    
+    fields = list(Workout.API_FIELDS)
+    if request.args.get('fields'):
+        fields = [field.strip() for field in request.args['fields'].split(',') if field.strip()]
+        unknown = [field for field in fields if field not in Workout.API_FIELDS]
+        if unknown:
+            return jsonify({'error': f'Unknown fields: {", ".join(unknown)}'}), 400
+    
+    # id and date are always selected since they make up the cursor
+    columns = {'id': Workout.id, 'date': Workout.date}
+    for field in fields:
+        attr = Workout.API_FIELDS[field]
+        columns.setdefault(attr, getattr(Workout, attr))
+    
+    query = db.session.query(*[column.label(attr) for attr, column in columns.items()]) \
+        .filter(Workout.user_id == user_id)
+    
+    cursor = request.args.get('cursor')
+    if cursor:
+        try:
+            cursor_date, cursor_id = decode_cursor(cursor)
+        except ValueError:
+            return jsonify({'error': 'Invalid cursor'}), 400
+    
+    # Two segments rather than NULLS LAST, which the databases place differently and the
+    # (user_id, date, id) index cannot serve on both: dated workouts first, then undated
+    rows = []
+    if not cursor or cursor_date is not None:
+        dated = query.filter(Workout.date.isnot(None))
+        if cursor:
+            dated = dated.filter(or_(
+                Workout.date < cursor_date,
+                and_(Workout.date == cursor_date, Workout.id > cursor_id)
+            ))
+        rows = dated.order_by(Workout.date.desc(), Workout.id).limit(limit + 1).all()
+    if len(rows) <= limit:
+        undated = query.filter(Workout.date.is_(None))
+        if cursor and cursor_date is None:
+            undated = undated.filter(Workout.id > cursor_id)
+        rows += undated.order_by(Workout.id).limit(limit + 1 - len(rows)).all()
+    
+    result = []
+    for row in rows[:limit]:
+        item = {}
+        for field in fields:
+            value = getattr(row, Workout.API_FIELDS[field])
+            item[field] = value.isoformat() if isinstance(value, (date, datetime)) else value
+        result.append(item)
+    
+    response = jsonify(result)
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        response.headers['X-Next-Cursor'] = encode_cursor(last.date, last.id)
+    return response, 200
+
 @workouts.route('/api/workouts')
 @login_required
 def api_workouts_list():
-    workouts = Workout.query.filter_by(user_id=current_user.id).order_by(Workout.date.desc()).all()
-    return jsonify([workout.to_dict() for workout in workouts]), 200
+    return paginated_workouts(current_user.id)
 
 @workouts.route('/api/users/<int:user_id>/workouts')
 @login_required
@@ -110,8 +243,7 @@ def api_user_workouts(user_id):
     if user_id != current_user.id:
         return jsonify({'error': 'Unauthorized'}), 403
     
-    workouts = Workout.query.filter_by(user_id=user_id).order_by(Workout.date.desc()).all()
-    return jsonify([workout.to_dict() for workout in workouts]), 200
+    return paginated_workouts(user_id)
 
 @workouts.route('/api/workouts/<int:workout_id>')
 @login_required
@@ -141,14 +273,11 @@ def api_create_workout():
         calories_burned=data.get('caloriesBurned')
     )
     
-    db.session.add(workout)
-    db.session.commit()
-    
     # Process workout exercises if included
+    exercise_rows = []
     if 'exercises' in data and isinstance(data['exercises'], list):
         for exercise_data in data['exercises']:
-            workout_exercise = WorkoutExercise(
-                workout_id=workout.id,
+            exercise_rows.append(dict(
                 exercise_id=exercise_data.get('exerciseId'),
                 sets=exercise_data.get('sets'),
                 reps=exercise_data.get('reps'),
@@ -157,13 +286,30 @@ def api_create_workout():
                 distance=exercise_data.get('distance'),
                 notes=exercise_data.get('notes'),
                 order=exercise_data.get('order', 0)
-            )
-            db.session.add(workout_exercise)
-        
-        db.session.commit()
+            ))
+    
+    save_workout(workout, exercise_rows)
     
     return jsonify(workout.to_dict()), 201
 
+@workouts.route('/api/workouts/import', methods=['POST'])
+@login_required
+def api_import_workouts():
+    """
+    Bulk import from an NDJSON (one workout object per line, as accepted by
+    POST /api/workouts) or CSV request body, read as a stream
+    """
+    format = 'csv' if request.mimetype == 'text/csv' or request.args.get('format') == 'csv' else 'ndjson'
+    try:
+        batch_size = int(request.args.get('batchSize', current_app.config['IMPORT_BATCH_SIZE']))
+    except ValueError:
+        return jsonify({'error': 'Invalid batchSize'}), 400
+    
+    lines = io.TextIOWrapper(request.stream, encoding='utf-8', newline='')
+    summary = import_workouts(current_user.id, lines, format=format, batch_size=max(1, batch_size))
+    
+    return jsonify(summary), 200 if not summary['failed'] else 207
+
 @workouts.route('/api/workouts/<int:workout_id>', methods=['PUT', 'PATCH'])
 @login_required
 def api_update_workout(workout_id):
@@ -219,17 +365,139 @@ def api_workout_exercises(workout_id):
     if workout.user_id != current_user.id:
         return jsonify({'error': 'Unauthorized'}), 403
     
-    workout_exercises = WorkoutExercise.query.filter_by(workout_id=workout_id).order_by(WorkoutExercise.order).all()
+    return jsonify(workout_exercise_dicts(workout_id)), 200
+
+def workout_exercise_dicts(workout_id):
+    """
+    A workout's exercises in order, each with its exercise nested, in one query
+    """
+    rows = db.session.query(WorkoutExercise, Exercise) \
+        .outerjoin(Exercise, Exercise.id == WorkoutExercise.exercise_id) \
+        .filter(WorkoutExercise.workout_id == workout_id) \
+        .order_by(WorkoutExercise.order, WorkoutExercise.id) \
+        .all()
     
     result = []
-    for we in workout_exercises:
+    for we, exercise in rows:
         we_dict = we.to_dict()
-        exercise = Exercise.query.get(we.exercise_id)
         if exercise:
             we_dict['exercise'] = exercise.to_dict()
         result.append(we_dict)
+    return result
+
+# Fields a batch "update" operation may change: (JSON key, column, type)
+BATCH_UPDATE_FIELDS = [
+    ('sets', 'sets', int),
+    ('reps', 'reps', int),
+    ('weight', 'weight', float),
+    ('duration', 'duration', int),
+    ('distance', 'distance', float),
+    ('notes', 'notes', str),
+    ('order', 'order', int),
+]
+
+def parse_batch_operations(operations, existing_ids):
+    """
+    Turn a list of batch operations into (rows to update by id, ids to delete), or ValueError.
+
+        {"op": "update", "id": 12, "sets": 4, "weight": 62.5}
+        {"op": "delete", "id": 13}
+        {"op": "reorder", "ids": [14, 12, 15]}    # order = position in the list
+
+    A reorder must list every exercise of the workout once, except those the batch deletes.
+    """
+    if not isinstance(operations, list) or not operations:
+        raise ValueError('expected a non-empty list of operations')
+    
+    updates, deletes, reorders = {}, set(), []
+    
+    def known(position, value):
+        if not isinstance(value, int) or value not in existing_ids:
+            raise ValueError(f'operations[{position}]: {value!r} is not an exercise of this workout')
+        return value
+    
+    for position, operation in enumerate(operations):
+        if not isinstance(operation, dict):
+            raise ValueError(f'operations[{position}]: expected an object')
+        op = operation.get('op')
+        if op == 'delete':
+            deletes.add(known(position, operation.get('id')))
+        elif op == 'reorder':
+            ids = operation.get('ids')
+            if not isinstance(ids, list):
+                raise ValueError(f'operations[{position}].ids: expected a list')
+            ids = [known(position, workout_exercise_id) for workout_exercise_id in ids]
+            if len(set(ids)) != len(ids):
+                raise ValueError(f'operations[{position}].ids: lists an exercise more than once')
+            reorders.append((position, ids))
+            for order, workout_exercise_id in enumerate(ids):
+                updates.setdefault(workout_exercise_id, {})['order'] = order
+        elif op == 'update':
+            values = updates.setdefault(known(position, operation.get('id')), {})
+            for key, column, kind in BATCH_UPDATE_FIELDS:
+                if key not in operation:
+                    continue
+                value = operation[key]
+                if kind is str:
+                    values[column] = value if value is None else str(value)
+                else:
+                    values[column] = number(value, kind, f'operations[{position}].{key}')
+        else:
+            raise ValueError(f'operations[{position}].op must be update, delete or reorder')
+    
+    # A partial reorder would leave the unlisted exercises sharing orders with the listed ones
+    for position, ids in reorders:
+        missing = existing_ids - deletes - set(ids)
+        if missing:
+            raise ValueError(f'operations[{position}].ids: must list every exercise of the workout, '
+                             f'missing {sorted(missing)}')
+    
+    rows = [dict(values, id=workout_exercise_id) for workout_exercise_id, values in updates.items()
+            if values and workout_exercise_id not in deletes]
+    return rows, deletes
+
+@workouts.route('/api/workouts/<int:workout_id>/exercises', methods=['PATCH'])
+@login_required
+def api_batch_workout_exercises(workout_id):
+    """
+    Apply a list of update/delete/reorder operations to a workout's exercises in one
+    transaction, returning the resulting exercise list
+    """
+    workout = Workout.query.get_or_404(workout_id)
+    
+    # Ownership is checked once for the whole batch
+    if workout.user_id != current_user.id:
+        return jsonify({'error': 'Unauthorized'}), 403
+    
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        data = data.get('operations')
+    
+    existing_ids = set(db.session.scalars(
+        db.select(WorkoutExercise.id).where(WorkoutExercise.workout_id == workout_id)
+    ))
+    try:
+        rows, deletes = parse_batch_operations(data, existing_ids)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    if deletes:
+        db.session.execute(
+            delete(WorkoutExercise)
+            .where(WorkoutExercise.workout_id == workout_id, WorkoutExercise.id.in_(deletes))
+            .execution_options(synchronize_session=False)
+        )
+    if rows:
+        # ORM bulk UPDATE by primary key: one executemany per set of changed columns
+        db.session.execute(update(WorkoutExercise), rows)
+    
+    # Bulk statements bypass the session listeners: refresh the rollup, counters and dashboard here
+    refresh_days(db.session.connection(), {(workout.user_id, workout.date)})
+    adjust(db.session.connection(), {workout.user_id: {'exercise_count': -len(deletes)}})
+    db.session.commit()
+    dashboard_cache.pop(workout.user_id)
     
-    return jsonify(result), 200
+    return jsonify(workout_exercise_dicts(workout_id)), 200
 
 @workouts.route('/api/workout-exercises', methods=['POST'])
 @login_required
@@ -0,0 +1,105 @@
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import event
+
+# Every TTLCache by name, for reporting (see app.utils.metrics)
+caches = {}
+
+
+class TTLCache:
+    """
+    Bounded, per-process LRU cache whose entries expire after a TTL.
+    Size and TTL can be overridden with <NAME>_CACHE_SIZE / <NAME>_CACHE_TTL config keys.
+    """
+    def __init__(self, name, maxsize=1024, ttl=60):
+        self.name = name
+        self.maxsize = self.default_maxsize = maxsize
+        self.ttl = self.default_ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        caches[name] = self
+
+    def init_app(self, app):
+        prefix = self.name.upper()
+        self.maxsize = app.config.get(f'{prefix}_CACHE_SIZE', self.default_maxsize)
+        self.ttl = app.config.get(f'{prefix}_CACHE_TTL', self.default_ttl)
+        self.clear()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                self._entries.pop(key, None)
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def get_or_set(self, key, build):
+        value = self.get(key)
+        if value is None:
+            value = build()
+            self.set(key, value)
+        return value
+
+    def pop(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hitRate': self.hits / lookups if lookups else None,
+        }
+
+
+_registered = set()
+
+
+def invalidate_on_commit(session, cache, *models, key='user_id'):
+    """
+    Drop cache entries keyed by user id after any commit that inserted, updated
+    or deleted an instance of one of models (whose user id is the attribute named by key).
+    Bulk UPDATE/DELETE statements bypass the session and must invalidate explicitly.
+    """
+    def collect(session, flush_context, instances):
+        pending = session.info.setdefault(f'{cache.name}_invalidate', set())
+        for instance in (*session.new, *session.dirty, *session.deleted):
+            if isinstance(instance, models) and getattr(instance, key) is not None:
+                pending.add(getattr(instance, key))
+
+    def invalidate(session):
+        for user_id in session.info.pop(f'{cache.name}_invalidate', ()):
+            cache.pop(user_id)
+
+    def discard(session):
+        session.info.pop(f'{cache.name}_invalidate', None)
+
+    if (id(session), cache.name) in _registered:
+        return
+    _registered.add((id(session), cache.name))
+    event.listen(session, 'before_flush', collect)
+    event.listen(session, 'after_commit', invalidate)
+    event.listen(session, 'after_rollback', discard)
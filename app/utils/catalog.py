@@ -0,0 +1,162 @@
+import os
+import threading
+import uuid
+
+from app import db
+from app.models.exercise import Exercise
+
+
+class MemoryVersionStore:
+    """
+    Catalog version kept in process memory. Only invalidates the current worker.
+    """
+    def __init__(self):
+        self._version = 0
+        self._lock = threading.Lock()
+
+    def get(self):
+        return self._version
+
+    def bump(self):
+        with self._lock:
+            self._version += 1
+
+
+class FileVersionStore:
+    """
+    Catalog version stamped into a local file, so every worker process on the
+    host sees an invalidation made by any one of them.
+    """
+    def __init__(self, path):
+        self.path = path
+
+    def get(self):
+        try:
+            with open(self.path) as f:
+                return f.read()
+        except FileNotFoundError:
+            return ''
+
+    def bump(self):
+        tmp_path = f'{self.path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(uuid.uuid4().hex)
+        os.replace(tmp_path, self.path)
+
+
+# Filter facet -> comma separated Exercise column it is built from
+TAG_FACETS = {
+    'muscle': 'muscle_groups',
+    'equipment': 'equipment',
+    'difficulty': 'difficulty',
+}
+
+
+def split_tags(value):
+    return [tag.strip() for tag in (value or '').split(',') if tag.strip()]
+
+
+def build_tag_index(exercises):
+    """
+    Inverted index per facet of lowercased tag -> exercises, plus each tag's display name
+    """
+    index = {facet: {} for facet in TAG_FACETS}
+    names = {facet: {} for facet in TAG_FACETS}
+    for exercise in exercises:
+        for facet, attr in TAG_FACETS.items():
+            for tag in split_tags(getattr(exercise, attr)):
+                index[facet].setdefault(tag.lower(), []).append(exercise)
+                names[facet].setdefault(tag.lower(), tag)
+    return {'exercises': index, 'names': names}
+
+
+VERSION_STORES = {
+    'memory': lambda app: MemoryVersionStore(),
+    'file': lambda app: FileVersionStore(app.config['EXERCISE_CACHE_VERSION_FILE']),
+}
+
+
+class ExerciseCatalog:
+    """
+    Process-wide cache of the exercise catalog, reloaded whenever the version
+    in the configured store changes. Cached exercises are detached from the
+    session and must be treated as read-only.
+    """
+    def __init__(self):
+        self.store = MemoryVersionStore()
+        self._lock = threading.Lock()
+        # (version, exercises, exercises by id, derived values), swapped as a whole on reload
+        self._state = (None, [], {}, {})
+
+    def init_app(self, app):
+        backend = app.config.get('EXERCISE_CACHE_BACKEND', 'memory')
+        self.store = backend if not isinstance(backend, str) else VERSION_STORES[backend](app)
+        self._state = (None, [], {}, {})
+
+    def _load(self):
+        version = self.store.get()
+        if version == self._state[0]:
+            return self._state
+        with self._lock:
+            if version != self._state[0]:
+                exercises = Exercise.query.order_by(Exercise.id).all()
+                for exercise in exercises:
+                    db.session.expunge(exercise)
+                by_id = {exercise.id: exercise for exercise in exercises}
+                self._state = (version, exercises, by_id, {})
+            return self._state
+
+    @property
+    def version(self):
+        return self._load()[0]
+
+    def latest_version(self):
+        """
+        Version in the store, without reloading the catalog when it has changed
+        """
+        return self.store.get()
+
+    def all(self):
+        return self._load()[1]
+
+    def get(self, exercise_id):
+        return self._load()[2].get(exercise_id)
+
+    def derived(self, name, build):
+        """
+        Value computed from the catalog by build(exercises), rebuilt once per catalog version
+        """
+        _, exercises, _, derived = self._load()
+        if name not in derived:
+            derived[name] = build(exercises)
+        return derived[name]
+
+    def tags(self, facet):
+        """
+        Sorted distinct tags of a facet, e.g. every muscle group in the catalog
+        """
+        index = self.derived('tag_index', build_tag_index)
+        return sorted(index['names'][facet].values())
+
+    def filter(self, **facets):
+        """
+        Exercises matching every given facet tag (case-insensitive), in catalog order
+        """
+        index = self.derived('tag_index', build_tag_index)
+        result = None
+        for facet, tag in facets.items():
+            if not tag:
+                continue
+            matched = index['exercises'][facet].get(tag.strip().lower(), [])
+            if result is None:
+                result = matched
+            else:
+                matched_ids = {exercise.id for exercise in matched}
+                result = [exercise for exercise in result if exercise.id in matched_ids]
+        return self.all() if result is None else result
+
+    def invalidate(self):
+        self.store.bump()
+
+
+exercise_catalog = ExerciseCatalog()
@@ -0,0 +1,174 @@
+from collections import Counter, defaultdict
+
+from sqlalchemy import event, select, update, insert, func, or_, inspect, bindparam
+
+from app.models.goal import Goal
+from app.models.stats import UserStats
+from app.models.user import User
+from app.models.workout import Workout, WorkoutExercise
+
+COUNTER_COLUMNS = ('workout_count', 'active_goal_count', 'completed_goal_count', 'exercise_count')
+
+
+def goal_column(completed):
+    return 'completed_goal_count' if completed else 'active_goal_count'
+
+
+def adjust(connection, deltas):
+    """
+    Apply {user_id: {column: delta}} to user_stats in the current transaction and bump
+    the version of every user in deltas (an empty delta only bumps the version).
+    Users without a row are skipped; their counts are taken when first read.
+    """
+    for user_id, changes in deltas.items():
+        values = {column: getattr(UserStats, column) + delta for column, delta in changes.items() if delta}
+        connection.execute(
+            update(UserStats).where(UserStats.user_id == user_id)
+            .values(version=UserStats.version + 1, **values)
+        )
+
+
+def exercise_count(user_id):
+    """
+    Scalar subquery counting the workout exercises of the user (an id or a correlated column)
+    """
+    return select(func.count(WorkoutExercise.id)) \
+        .join(Workout, Workout.id == WorkoutExercise.workout_id) \
+        .where(Workout.user_id == user_id).scalar_subquery()
+
+
+def counts_select(*conditions):
+    """
+    SELECT (user_id, workout_count, active_goal_count, completed_goal_count, exercise_count)
+    counted from the source tables for the users matching conditions
+    """
+    def goals(*where):
+        return select(func.count(Goal.id)).where(Goal.user_id == User.id, *where).scalar_subquery()
+
+    return select(
+        User.id.label('user_id'),
+        select(func.count(Workout.id)).where(Workout.user_id == User.id).scalar_subquery().label('workout_count'),
+        goals(or_(Goal.completed.is_(None), Goal.completed == False)).label('active_goal_count'),
+        goals(Goal.completed == True).label('completed_goal_count'),
+        exercise_count(User.id).label('exercise_count'),
+    ).where(*conditions)
+
+
+def insert_missing(connection):
+    """
+    INSERT into user_stats that skips users whose row another transaction has just
+    inserted (e.g. two first visits to the profile at once)
+    """
+    if connection.dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif connection.dialect.name == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        return insert(UserStats)
+    return dialect_insert(UserStats).on_conflict_do_nothing(index_elements=['user_id'])
+
+
+def reconcile(connection, user_ids=None):
+    """
+    Recount user_stats from the source tables, for every user or only the given ones,
+    writing only the rows that are missing or have drifted.
+    Returns (users checked, rows repaired).
+    """
+    conditions = [User.id.in_(user_ids)] if user_ids else []
+    stored_conditions = [UserStats.user_id.in_(user_ids)] if user_ids else []
+    stored = {
+        row.user_id: tuple(row[1:])
+        for row in connection.execute(select(UserStats.user_id, *[getattr(UserStats, c) for c in COUNTER_COLUMNS])
+                                      .where(*stored_conditions))
+    }
+    counted = [dict(row._mapping) for row in connection.execute(counts_select(*conditions))]
+
+    missing = [row for row in counted if row['user_id'] not in stored]
+    drifted = [row for row in counted if row['user_id'] in stored
+               and stored[row['user_id']] != tuple(row[column] for column in COUNTER_COLUMNS)]
+    if missing:
+        connection.execute(insert_missing(connection), missing)
+    if drifted:
+        table = UserStats.__table__
+        connection.execute(
+            update(table).where(table.c.user_id == bindparam('uid'))
+            .values({column: bindparam(f'new_{column}') for column in COUNTER_COLUMNS}),
+            [{'uid': row['user_id'], **{f'new_{column}': row[column] for column in COUNTER_COLUMNS}}
+             for row in drifted]
+        )
+    return len(counted), len(missing) + len(drifted)
+
+
+def _old(state, key):
+    history = state.attrs[key].history
+    return history.deleted[0] if history.deleted else getattr(state.obj(), key)
+
+
+def _workout_user_id(session, workout_id):
+    workout = session.get(Workout, workout_id)
+    return workout.user_id if workout is not None else None
+
+
+def _flush_deltas(session):
+    deltas = defaultdict(Counter)
+    for instance in session.new:
+        if isinstance(instance, Workout):
+            deltas[instance.user_id]['workout_count'] += 1
+        elif isinstance(instance, WorkoutExercise):
+            deltas[_workout_user_id(session, instance.workout_id)]['exercise_count'] += 1
+        elif isinstance(instance, Goal):
+            deltas[instance.user_id][goal_column(instance.completed)] += 1
+
+    for instance in session.deleted:
+        state = inspect(instance)
+        if isinstance(instance, Workout):
+            deltas[_old(state, 'user_id')]['workout_count'] -= 1
+        elif isinstance(instance, WorkoutExercise):
+            # A deleted workout's exercises are deleted by the cascade and counted here
+            deltas[_workout_user_id(session, _old(state, 'workout_id'))]['exercise_count'] -= 1
+        elif isinstance(instance, Goal):
+            deltas[_old(state, 'user_id')][goal_column(_old(state, 'completed'))] -= 1
+
+    for instance in session.dirty:
+        state = inspect(instance)
+        if isinstance(instance, WorkoutExercise):
+            old_user_id = _workout_user_id(session, _old(state, 'workout_id'))
+            user_id = _workout_user_id(session, instance.workout_id)
+            deltas[user_id]  # Any change to a workout's exercises bumps the user's version
+            if old_user_id != user_id:
+                deltas[old_user_id]['exercise_count'] -= 1
+                deltas[user_id]['exercise_count'] += 1
+            continue
+        if not isinstance(instance, (Workout, Goal)):
+            continue
+        old_user_id = _old(state, 'user_id')
+        if isinstance(instance, Workout):
+            deltas[instance.user_id]  # Any workout edit bumps the user's version
+            if old_user_id != instance.user_id:
+                moved = instance.workout_exercises.count()
+                deltas[old_user_id].update({'workout_count': -1, 'exercise_count': -moved})
+                deltas[instance.user_id].update({'workout_count': 1, 'exercise_count': moved})
+            continue
+        deltas[instance.user_id]  # Any goal edit bumps the user's version
+        old_column, column = goal_column(_old(state, 'completed')), goal_column(instance.completed)
+        if (old_user_id, old_column) != (instance.user_id, column):
+            deltas[old_user_id][old_column] -= 1
+            deltas[instance.user_id][column] += 1
+    return deltas
+
+
+def register_counters(session):
+    """
+    Keep user_stats in step with workouts, their exercises and goals written through
+    the session, in the same transaction. Bulk statements must call adjust() themselves.
+    """
+    if not event.contains(session, 'after_flush', _adjust):
+        event.listen(session, 'after_flush', _adjust)
+
+
+def _adjust(session, flush_context):
+    with session.no_autoflush:
+        deltas = _flush_deltas(session)
+    deltas.pop(None, None)
+    if deltas:
+        adjust(session.connection(), deltas)
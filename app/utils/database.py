@@ -0,0 +1,50 @@
+from sqlalchemy import event
+
+from app import db
+
+
+def pragma_setter(pragmas):
+    """
+    A connect listener running PRAGMA name=value for each item of `pragmas`
+    """
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
+    return set_pragmas
+
+
+def apply_sqlite_pragmas(app):
+    """
+    Run the SQLITE_PRAGMAS config on every new connection of the app's SQLite engines.
+    Must be called before the first connection is opened.
+    """
+    pragmas = app.config.get('SQLITE_PRAGMAS') or {}
+    with app.app_context():
+        engines = [engine for engine in db.engines.values() if engine.dialect.name == 'sqlite']
+    set_pragmas = pragma_setter(pragmas)
+
+    for engine in engines:
+        if pragmas and not event.contains(engine, 'connect', set_pragmas):
+            event.listen(engine, 'connect', set_pragmas)
+
+
+def init_database():
+    """
+    Create missing tables, apply pending migrations, create the exercise search index
+    and seed the built-in exercises. Idempotent; run by `flask init-db` at deploy time,
+    not on app startup. Returns the number of exercises added.
+    """
+    from app.utils.catalog import exercise_catalog
+    from app.utils.migrations import upgrade
+    from app.utils.search import exercise_search
+    from app.utils.seed_db import seed_exercises
+
+    db.create_all()
+    upgrade()
+    exercise_search.create_index()
+    added = seed_exercises()
+    if added:
+        exercise_catalog.invalidate()
+    return added
@@ -0,0 +1,289 @@
+import csv
+import io
+import json
+import struct
+import sys
+from array import array
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import select
+
+from app import db
+from app.models.workout import Workout, WorkoutExercise
+from app.models.goal import Goal
+from app.utils.importer import CSV_WORKOUT_COLUMNS, CSV_EXERCISE_COLUMNS
+
+# Rows fetched per round-trip from the server-side cursor
+YIELD_PER = 1000
+# Rows per row group in the columnar format
+ROW_GROUP_SIZE = 4096
+# Approximate size of each text chunk handed to the response
+CHUNK_SIZE = 64 * 1024
+
+# Exported tables: (model, [(export name, column attribute, type)])
+TABLES = {
+    'workouts': (Workout, [
+        ('id', 'id', 'int'),
+        ('userId', 'user_id', 'int'),
+        ('name', 'name', 'str'),
+        ('date', 'date', 'date'),
+        ('duration', 'duration', 'int'),
+        ('type', 'type', 'str'),
+        ('notes', 'notes', 'str'),
+        ('caloriesBurned', 'calories_burned', 'int'),
+        ('createdAt', 'created_at', 'datetime'),
+    ]),
+    'workout_exercises': (WorkoutExercise, [
+        ('id', 'id', 'int'),
+        ('workoutId', 'workout_id', 'int'),
+        ('exerciseId', 'exercise_id', 'int'),
+        ('sets', 'sets', 'int'),
+        ('reps', 'reps', 'int'),
+        ('weight', 'weight', 'float'),
+        ('duration', 'duration', 'int'),
+        ('distance', 'distance', 'float'),
+        ('notes', 'notes', 'str'),
+        ('order', 'order', 'int'),
+    ]),
+    'goals': (Goal, [
+        ('id', 'id', 'int'),
+        ('userId', 'user_id', 'int'),
+        ('name', 'name', 'str'),
+        ('description', 'description', 'str'),
+        ('type', 'type', 'str'),
+        ('targetValue', 'target_value', 'float'),
+        ('currentValue', 'current_value', 'float'),
+        ('unit', 'unit', 'str'),
+        ('startDate', 'start_date', 'date'),
+        ('endDate', 'end_date', 'date'),
+        ('completed', 'completed', 'bool'),
+        ('metric', 'metric', 'str'),
+        ('exerciseId', 'exercise_id', 'int'),
+        ('createdAt', 'created_at', 'datetime'),
+    ]),
+}
+
+
+def stream_rows(user_id, table):
+    """
+    Rows of one table for a user, in id order, fetched YIELD_PER at a time
+    """
+    model, columns = TABLES[table]
+    query = select(*[getattr(model, attr) for _, attr, _ in columns])
+    if model is WorkoutExercise:
+        query = query.join(Workout, Workout.id == WorkoutExercise.workout_id) \
+            .where(Workout.user_id == user_id) \
+            .order_by(WorkoutExercise.workout_id, WorkoutExercise.order, WorkoutExercise.id)
+    else:
+        query = query.where(model.user_id == user_id).order_by(model.id)
+    return db.session.execute(query.execution_options(yield_per=YIELD_PER))
+
+
+def record(table, row):
+    return {
+        name: value.isoformat() if isinstance(value, (date, datetime)) else value
+        for (name, _, _), value in zip(TABLES[table][1], row)
+    }
+
+
+def workouts_with_exercises(user_id):
+    """
+    Each workout record with its exercises nested, merging two sorted cursors
+    so only one workout's exercises are held in memory at a time
+    """
+    exercises = iter(stream_rows(user_id, 'workout_exercises'))
+    pending = next(exercises, None)
+    for row in stream_rows(user_id, 'workouts'):
+        workout = record('workouts', row)
+        workout['exercises'] = []
+        while pending is not None and pending.workout_id <= workout['id']:
+            if pending.workout_id == workout['id']:
+                workout['exercises'].append(record('workout_exercises', pending))
+            pending = next(exercises, None)
+        yield workout
+
+
+def chunked(pieces):
+    buffer, size = [], 0
+    for piece in pieces:
+        buffer.append(piece)
+        size += len(piece)
+        if size >= CHUNK_SIZE:
+            yield ''.join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield ''.join(buffer)
+
+
+def export_ndjson(user_id):
+    """
+    Workouts (with nested exercises, importable by the bulk importer) followed by goals,
+    one JSON object per line, each tagged with a recordType
+    """
+    def lines():
+        for workout in workouts_with_exercises(user_id):
+            yield json.dumps({'recordType': 'workout', **workout}) + '\n'
+        for row in stream_rows(user_id, 'goals'):
+            yield json.dumps({'recordType': 'goal', **record('goals', row)}) + '\n'
+    return chunked(lines())
+
+
+def export_csv(user_id, resource='workouts'):
+    """
+    Workouts in the importer's CSV layout (one row per workout exercise), or goals
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def take():
+        value = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return value
+
+    def rows():
+        if resource == 'goals':
+            writer.writerow([name for name, _, _ in TABLES['goals'][1]])
+            for row in stream_rows(user_id, 'goals'):
+                writer.writerow(record('goals', row).values())
+                yield take()
+            return
+
+        exercise_columns = list(CSV_EXERCISE_COLUMNS.items())
+        writer.writerow(CSV_WORKOUT_COLUMNS + [column for column, _ in exercise_columns])
+        for workout in workouts_with_exercises(user_id):
+            head = [workout[column] for column in CSV_WORKOUT_COLUMNS]
+            for exercise in workout['exercises'] or [None]:
+                tail = [exercise[key] if exercise else None for _, key in exercise_columns]
+                writer.writerow(head + tail)
+            yield take()
+
+    return chunked(rows())
+
+
+# Columnar format
+#
+#   b'FTCOL1' then, per table:
+#     uint32 header length + JSON header {"table": ..., "columns": [[name, type], ...]}
+#     row groups: uint32 row count (0 ends the table), then per column:
+#       null bitmap (ceil(rows / 8) bytes, bit set = value present)
+#       values, little-endian, nulls stored as zero / empty:
+#         int, datetime (µs since epoch) -> int64; float -> float64;
+#         date (days since epoch) -> int32; bool -> int8;
+#         str -> int32 byte lengths followed by the concatenated UTF-8 bytes
+#   The stream ends with a uint32 header length of 0.
+
+MAGIC = b'FTCOL1'
+EPOCH = datetime(1970, 1, 1)
+ARRAY_CODES = {'int': 'q', 'datetime': 'q', 'float': 'd', 'date': 'i', 'bool': 'b'}
+
+
+def to_storage(kind, value):
+    if value is None:
+        return 0
+    if kind == 'date':
+        return (value - EPOCH.date()).days
+    if kind == 'datetime':
+        return (value - EPOCH) // timedelta(microseconds=1)
+    return value
+
+
+def from_storage(kind, value):
+    if kind == 'date':
+        return EPOCH.date() + timedelta(days=value)
+    if kind == 'datetime':
+        return EPOCH + timedelta(microseconds=value)
+    if kind == 'bool':
+        return bool(value)
+    return value
+
+
+def little_endian(values):
+    # array() uses native byte order; the format is always little-endian
+    if sys.byteorder != 'little':
+        values.byteswap()
+    return values
+
+
+def encode_row_group(columns, rows):
+    parts = [struct.pack('<I', len(rows))]
+    for index, (_, _, kind) in enumerate(columns):
+        values = [row[index] for row in rows]
+        mask = 0
+        for position, value in enumerate(values):
+            if value is not None:
+                mask |= 1 << position
+        parts.append(mask.to_bytes((len(rows) + 7) // 8, 'little'))
+        if kind == 'str':
+            encoded = [(value or '').encode() for value in values]
+            parts.append(little_endian(array('i', [len(item) for item in encoded])).tobytes())
+            parts.append(b''.join(encoded))
+        else:
+            parts.append(little_endian(array(ARRAY_CODES[kind], [to_storage(kind, value) for value in values])).tobytes())
+    return b''.join(parts)
+
+
+def export_columnar(user_id):
+    """
+    Workouts, workout exercises and goals as flat tables in the columnar binary format
+    """
+    yield MAGIC
+    for table, (_, columns) in TABLES.items():
+        header = json.dumps({'table': table, 'columns': [[name, kind] for name, _, kind in columns]}).encode()
+        yield struct.pack('<I', len(header)) + header
+        group = []
+        for row in stream_rows(user_id, table):
+            group.append(tuple(row))
+            if len(group) >= ROW_GROUP_SIZE:
+                yield encode_row_group(columns, group)
+                group = []
+        if group:
+            yield encode_row_group(columns, group)
+        yield struct.pack('<I', 0)
+    yield struct.pack('<I', 0)
+
+
+def read_columnar(stream):
+    """
+    Yields (table name, record dict) from a columnar export file object
+    """
+    def read(size):
+        data = stream.read(size)
+        if len(data) != size:
+            raise ValueError('truncated columnar export')
+        return data
+
+    if read(len(MAGIC)) != MAGIC:
+        raise ValueError('not a columnar export')
+    while True:
+        (header_size,) = struct.unpack('<I', read(4))
+        if not header_size:
+            return
+        header = json.loads(read(header_size))
+        while True:
+            (count,) = struct.unpack('<I', read(4))
+            if not count:
+                break
+            columns = []
+            for name, kind in header['columns']:
+                mask = int.from_bytes(read((count + 7) // 8), 'little')
+                if kind == 'str':
+                    lengths = array('i')
+                    lengths.frombytes(read(4 * count))
+                    little_endian(lengths)
+                    blob = read(sum(lengths))
+                    values, offset = [], 0
+                    for length in lengths:
+                        values.append(blob[offset:offset + length].decode())
+                        offset += length
+                else:
+                    values = array(ARRAY_CODES[kind])
+                    values.frombytes(read(values.itemsize * count))
+                    values = [from_storage(kind, value) for value in little_endian(values)]
+                columns.append([
+                    value if mask >> position & 1 else None
+                    for position, value in enumerate(values)
+                ])
+            names = [name for name, _ in header['columns']]
+            for values in zip(*columns):
+                yield header['table'], dict(zip(names, values))
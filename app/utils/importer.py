@@ -0,0 +1,189 @@
+import csv
+import json
+from datetime import datetime
+
+from sqlalchemy import insert
+from sqlalchemy.exc import SQLAlchemyError
+
+from app import db
+from app.models.workout import Workout, WorkoutExercise
+from app.utils.catalog import exercise_catalog
+from app.utils.counters import adjust
+from app.utils.rollup import refresh_days
+from app.utils.validation import number
+
+# CSV layout: one row per workout exercise, workout columns repeated on each row.
+# Consecutive rows with the same name and date belong to the same workout.
+CSV_WORKOUT_COLUMNS = ['name', 'date', 'duration', 'type', 'notes', 'caloriesBurned']
+CSV_EXERCISE_COLUMNS = {
+    'exerciseId': 'exerciseId',
+    'sets': 'sets',
+    'reps': 'reps',
+    'weight': 'weight',
+    'exerciseDuration': 'duration',
+    'distance': 'distance',
+    'exerciseNotes': 'notes',
+    'order': 'order',
+}
+
+MAX_REPORTED_ERRORS = 1000
+
+
+def read_ndjson(lines):
+    """
+    Yields (line number, workout record, error) for each non-blank line.
+    Records of another recordType (e.g. goals in a full export) are skipped.
+    """
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            yield number, None, 'invalid JSON'
+            continue
+        if isinstance(record, dict) and record.get('recordType', 'workout') != 'workout':
+            continue
+        yield number, record, None
+
+
+def read_csv(lines):
+    """
+    Yields (line number of the first row, workout record, error), grouping the
+    exercise rows of each workout into one record
+    """
+    reader = csv.DictReader(lines)
+    record, first_line = None, None
+    for row in reader:
+        key = (row.get('name'), row.get('date'))
+        if record is None or key != (record.get('name'), record.get('date')):
+            if record is not None:
+                yield first_line, record, None
+            record = {column: row.get(column) for column in CSV_WORKOUT_COLUMNS}
+            record['exercises'] = []
+            first_line = reader.line_num
+        if row.get('exerciseId'):
+            record['exercises'].append({key: row.get(column) for column, key in CSV_EXERCISE_COLUMNS.items()})
+    if record is not None:
+        yield first_line, record, None
+
+
+READERS = {
+    'ndjson': read_ndjson,
+    'csv': read_csv,
+}
+
+
+def validate_workout(record):
+    """
+    Workout and workout exercise column values from an API-style record, or ValueError
+    """
+    if not isinstance(record, dict):
+        raise ValueError('expected a workout object')
+    name = (record.get('name') or '').strip()
+    if not name:
+        raise ValueError('name is required')
+    try:
+        date = datetime.fromisoformat(record['date']).date() if record.get('date') else datetime.utcnow().date()
+    except (TypeError, ValueError):
+        raise ValueError('date must be an ISO date')
+
+    workout = {
+        'name': name[:100],
+        'date': date,
+        'duration': number(record.get('duration'), int, 'duration'),
+        'type': record.get('type') or None,
+        'notes': record.get('notes') or None,
+        'calories_burned': number(record.get('caloriesBurned'), int, 'caloriesBurned'),
+    }
+
+    exercises = []
+    for position, item in enumerate(record.get('exercises') or []):
+        if not isinstance(item, dict):
+            raise ValueError(f'exercises[{position}]: expected an object')
+        exercise_id = number(item.get('exerciseId'), int, f'exercises[{position}].exerciseId')
+        if exercise_id is None or exercise_catalog.get(exercise_id) is None:
+            raise ValueError(f'exercises[{position}]: unknown exerciseId')
+        order = number(item.get('order'), int, f'exercises[{position}].order')
+        exercises.append({
+            'exercise_id': exercise_id,
+            'sets': number(item.get('sets'), int, f'exercises[{position}].sets'),
+            'reps': number(item.get('reps'), int, f'exercises[{position}].reps'),
+            'weight': number(item.get('weight'), float, f'exercises[{position}].weight'),
+            'duration': number(item.get('duration'), int, f'exercises[{position}].duration'),
+            'distance': number(item.get('distance'), float, f'exercises[{position}].distance'),
+            'notes': item.get('notes') or None,
+            'order': order if order is not None else position,
+        })
+    return workout, exercises
+
+
+def insert_batch(user_id, batch):
+    """
+    Insert a batch of validated (workout, exercises) pairs with one executemany per table
+    """
+    workout_rows = [dict(workout, user_id=user_id) for _, workout, _ in batch]
+    workout_ids = db.session.execute(
+        insert(Workout).returning(Workout.id, sort_by_parameter_order=True), workout_rows
+    ).scalars().all()
+
+    exercise_rows = [
+        dict(exercise, workout_id=workout_id)
+        for workout_id, (_, _, exercises) in zip(workout_ids, batch)
+        for exercise in exercises
+    ]
+    if exercise_rows:
+        db.session.execute(insert(WorkoutExercise), exercise_rows)
+
+    # Bulk inserts bypass the session listeners, so refresh the rollups and counters here
+    refresh_days(db.session.connection(), {(user_id, workout['date']) for workout in workout_rows})
+    adjust(db.session.connection(), {user_id: {'workout_count': len(workout_rows), 'exercise_count': len(exercise_rows)}})
+
+
+def import_workouts(user_id, lines, format='ndjson', batch_size=500):
+    """
+    Stream workouts from NDJSON or CSV lines into the database, committing every
+    batch_size valid workouts. Invalid rows are reported and skipped; a batch that
+    fails in the database is retried row by row so only the offending rows are lost.
+    """
+    summary = {'imported': 0, 'failed': 0, 'errors': []}
+
+    def fail(line, error):
+        summary['failed'] += 1
+        if len(summary['errors']) < MAX_REPORTED_ERRORS:
+            summary['errors'].append({'line': line, 'error': error})
+
+    def flush(batch):
+        try:
+            insert_batch(user_id, batch)
+            db.session.commit()
+            summary['imported'] += len(batch)
+        except SQLAlchemyError:
+            db.session.rollback()
+            if len(batch) == 1:
+                fail(batch[0][0], 'could not be saved')
+                return
+            for item in batch:
+                flush([item])
+
+    batch = []
+    for line, record, error in READERS[format](lines):
+        if error is None:
+            try:
+                workout, exercises = validate_workout(record)
+            except ValueError as e:
+                error = str(e)
+        if error is not None:
+            fail(line, error)
+            continue
+        batch.append((line, workout, exercises))
+        if len(batch) >= batch_size:
+            flush(batch)
+            batch = []
+    if batch:
+        flush(batch)
+
+    if summary['imported']:
+        from app.routes.main import dashboard_cache
+        dashboard_cache.pop(user_id)
+    return summary
@@ -0,0 +1,223 @@
+import bisect
+import hmac
+import ipaddress
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from flask import Response, abort, g, has_request_context, request, template_rendered, before_render_template
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import event
+
+from app import db
+from app.utils.cache import caches
+
+logger = logging.getLogger('fittrack.metrics')
+
+# Histogram upper bounds: request latency in seconds, and SQL statements per request
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def lines(self, name, labels):
+        cumulative = 0
+        for bound, count in zip((*self.bounds, '+Inf'), self.counts):
+            cumulative += count
+            yield f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+        yield f'{name}_sum{{{labels}}} {self.sum:.6f}'
+        yield f'{name}_count{{{labels}}} {self.count}'
+
+
+class EndpointStats:
+    def __init__(self):
+        self.statuses = defaultdict(int)
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.queries = Histogram(QUERY_BUCKETS)
+        self.db_time = 0.0
+        self.serialization_time = 0.0
+
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """
+    Default JSON provider that adds the time spent encoding responses to the request's metrics
+    """
+    def response(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return super().response(*args, **kwargs)
+        finally:
+            add_serialization_time(time.perf_counter() - start)
+
+
+def current():
+    return g.get('_request_metrics') if has_request_context() else None
+
+
+def add_serialization_time(elapsed):
+    state = current()
+    if state is not None:
+        state['serialization'] += elapsed
+
+
+class RequestMetrics:
+    """
+    Per-process request instrumentation: statement counts and DB time from SQLAlchemy
+    engine events, latency and serialization time from Flask hooks, exposed in the
+    Prometheus text format at /metrics (for METRICS_TOKEN or METRICS_ALLOWED_IPS
+    only). Requests and statements slower than SLOW_REQUEST_MS / SLOW_QUERY_MS
+    are logged (0 disables).
+    """
+    def __init__(self):
+        self.slow_request = 0
+        self.slow_query = 0
+        self.token = None
+        self.allowed_networks = []
+        self._lock = threading.Lock()
+        self.endpoints = defaultdict(EndpointStats)
+
+    def init_app(self, app):
+        self.slow_request = app.config.get('SLOW_REQUEST_MS', 0) / 1000
+        self.slow_query = app.config.get('SLOW_QUERY_MS', 0) / 1000
+        self.token = app.config.get('METRICS_TOKEN')
+        self.allowed_networks = [ipaddress.ip_network(entry.strip(), strict=False)
+                                 for entry in app.config.get('METRICS_ALLOWED_IPS', '').split(',') if entry.strip()]
+        self.endpoints.clear()
+        if not app.config.get('METRICS_ENABLED', True):
+            return
+
+        app.json = TimedJSONProvider(app)
+        app.before_request(self.start_request)
+        app.after_request(self.finish_on_close)
+        before_render_template.connect(self.start_render, app)
+        template_rendered.connect(self.finish_render, app)
+        app.add_url_rule('/metrics', 'metrics', self.view)
+
+        with app.app_context():
+            engines = list(db.engines.values())
+        for engine in engines:
+            if not event.contains(engine, 'before_cursor_execute', self.before_execute):
+                event.listen(engine, 'before_cursor_execute', self.before_execute)
+                event.listen(engine, 'after_cursor_execute', self.after_execute)
+
+    # SQLAlchemy engine events
+
+    def before_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+    def after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info['query_start'].pop()
+        state = current()
+        if state is not None:
+            state['queries'] += 1
+            state['db'] += elapsed
+        if self.slow_query and elapsed >= self.slow_query:
+            logger.warning('Slow query (%.1f ms)%s: %s', elapsed * 1000,
+                           f' in {request.endpoint}' if state is not None else '', ' '.join(statement.split()))
+
+    # Flask hooks
+
+    def start_request(self):
+        g._request_metrics = {'start': time.perf_counter(), 'queries': 0, 'db': 0.0, 'serialization': 0.0}
+
+    def finish_on_close(self, response):
+        # Recorded when the server closes the response, so streamed bodies are included
+        state = current()
+        if state is not None:
+            state['status'] = response.status_code
+            labels = (request.endpoint or 'unmatched', request.method, request.full_path.rstrip('?'))
+            response.call_on_close(lambda: self.finish_request(state, *labels))
+        return response
+
+    def start_render(self, sender, template, context, **extra):
+        state = current()
+        if state is not None:
+            state['render_start'] = time.perf_counter()
+
+    def finish_render(self, sender, template, context, **extra):
+        state = current()
+        if state is not None and 'render_start' in state:
+            state['serialization'] += time.perf_counter() - state.pop('render_start')
+
+    def finish_request(self, state, endpoint, method, path):
+        elapsed = time.perf_counter() - state['start']
+        with self._lock:
+            stats = self.endpoints[(endpoint, method)]
+            stats.statuses[state['status']] += 1
+            stats.latency.observe(elapsed)
+            stats.queries.observe(state['queries'])
+            stats.db_time += state['db']
+            stats.serialization_time += state['serialization']
+        if self.slow_request and elapsed >= self.slow_request:
+            logger.warning('Slow request (%.1f ms): %s %s -> %s, %d queries, %.1f ms in DB, %.1f ms serializing',
+                           elapsed * 1000, method, path, state['status'],
+                           state['queries'], state['db'] * 1000, state['serialization'] * 1000)
+
+    # Exposition
+
+    def render(self):
+        lines = []
+
+        def family(name, kind, help):
+            lines.append(f'# HELP {name} {help}')
+            lines.append(f'# TYPE {name} {kind}')
+
+        with self._lock:
+            endpoints = sorted(self.endpoints.items())
+            family('fittrack_requests_total', 'counter', 'Requests handled, by endpoint, method and status.')
+            for (endpoint, method), stats in endpoints:
+                for status, count in sorted(stats.statuses.items()):
+                    lines.append(f'fittrack_requests_total{{endpoint="{endpoint}",method="{method}",status="{status}"}} {count}')
+            family('fittrack_request_duration_seconds', 'histogram', 'Request latency, including streamed bodies.')
+            for (endpoint, method), stats in endpoints:
+                lines.extend(stats.latency.lines('fittrack_request_duration_seconds', f'endpoint="{endpoint}",method="{method}"'))
+            family('fittrack_request_queries', 'histogram', 'SQL statements issued per request.')
+            for (endpoint, method), stats in endpoints:
+                lines.extend(stats.queries.lines('fittrack_request_queries', f'endpoint="{endpoint}",method="{method}"'))
+            family('fittrack_request_db_seconds_total', 'counter', 'Time spent executing SQL statements.')
+            for (endpoint, method), stats in endpoints:
+                lines.append(f'fittrack_request_db_seconds_total{{endpoint="{endpoint}",method="{method}"}} {stats.db_time:.6f}')
+            family('fittrack_request_serialization_seconds_total', 'counter', 'Time spent rendering templates and encoding JSON.')
+            for (endpoint, method), stats in endpoints:
+                lines.append(f'fittrack_request_serialization_seconds_total{{endpoint="{endpoint}",method="{method}"}} {stats.serialization_time:.6f}')
+
+        for name, kind, help, key in (
+            ('fittrack_cache_hits_total', 'counter', 'Cache lookups that found an entry.', 'hits'),
+            ('fittrack_cache_misses_total', 'counter', 'Cache lookups that found nothing.', 'misses'),
+            ('fittrack_cache_entries', 'gauge', 'Entries currently held.', 'size'),
+        ):
+            family(name, kind, help)
+            for cache_name, cache in sorted(caches.items()):
+                lines.append(f'{name}{{cache="{cache_name}"}} {cache.stats()[key]}')
+        return '\n'.join(lines) + '\n'
+
+    def authorized(self):
+        if self.token:
+            scheme, _, credentials = request.headers.get('Authorization', '').partition(' ')
+            if scheme.lower() == 'bearer' and hmac.compare_digest(credentials.encode(), self.token.encode()):
+                return True
+        try:
+            address = ipaddress.ip_address(request.remote_addr or '')
+        except ValueError:
+            return False
+        return any(address in network for network in self.allowed_networks)
+
+    def view(self):
+        if not self.authorized():
+            abort(403)
+        return Response(self.render(), mimetype='text/plain; version=0.0.4')
+
+
+request_metrics = RequestMetrics()
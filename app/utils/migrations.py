@@ -0,0 +1,138 @@
+from datetime import datetime
+
+from sqlalchemy import inspect, text
+from sqlalchemy.schema import CreateIndex
+
+from app import db
+
+# Applied migrations, by id
+schema_migrations = db.Table(
+    'schema_migrations',
+    db.Column('id', db.String(100), primary_key=True),
+    db.Column('applied_at', db.DateTime, nullable=False),
+)
+
+# (id, function(connection)) in the order they apply
+MIGRATIONS = []
+
+
+def migration(id, transactional=True):
+    """
+    Register a schema change for databases created before it. `flask init-db` runs them
+    after create_all() and `flask migrate` without it, so they must create the tables they
+    need and tolerate a fresh database that already has the change.
+    Non-transactional ones run in autocommit mode (e.g. CREATE INDEX CONCURRENTLY).
+    """
+    def register(function):
+        MIGRATIONS.append((id, function, transactional))
+        return function
+    return register
+
+
+def create_indexes(connection, *indexes):
+    """
+    Create the model-declared indexes that are missing; concurrently on PostgreSQL,
+    so building them over large tables does not block writes
+    """
+    for index in indexes:
+        if connection.dialect.name == 'postgresql':
+            statement = str(CreateIndex(index, if_not_exists=True).compile(dialect=connection.dialect))
+            connection.execute(text(statement.replace('CREATE INDEX', 'CREATE INDEX CONCURRENTLY', 1)))
+        else:
+            index.create(connection, checkfirst=True)
+
+
+def add_columns(connection, table, *names):
+    """
+    Add the named model columns that the database table is missing. A NOT NULL column
+    needs a server_default to fill the existing rows.
+    """
+    existing = {column['name'] for column in inspect(connection).get_columns(table.name)}
+    preparer = connection.dialect.identifier_preparer
+    for name in names:
+        if name in existing:
+            continue
+        column = table.c[name]
+        definition = f'{preparer.format_column(column)} {column.type.compile(dialect=connection.dialect)}'
+        if column.server_default is not None:
+            definition += f" DEFAULT '{column.server_default.arg}'"
+        if not column.nullable:
+            definition += ' NOT NULL'
+        for key in column.foreign_keys:
+            target = key.column
+            definition += f' REFERENCES {preparer.format_table(target.table)} ({preparer.format_column(target)})'
+            if key.ondelete:
+                definition += f' ON DELETE {key.ondelete}'
+        connection.execute(text(f'ALTER TABLE {preparer.format_table(table)} ADD COLUMN {definition}'))
+
+
+def drop_index(connection, table, name):
+    if name in {index['name'] for index in inspect(connection).get_indexes(table)}:
+        connection.execute(text(f'DROP INDEX {name}'))
+
+
+@migration('0001_goal_progress_columns')
+def goal_progress_columns(connection):
+    # Goal.metric and Goal.exercise_id; create_all() does not add columns to existing tables
+    from app.models.goal import Goal
+    add_columns(connection, Goal.__table__, 'metric', 'exercise_id')
+
+
+@migration('0002_foreign_key_indexes', transactional=False)
+def foreign_key_indexes(connection):
+    from app.models.goal import Goal
+    from app.models.workout import Workout, WorkoutExercise
+
+    indexes = [index for model in (Workout, WorkoutExercise, Goal) for index in model.__table__.indexes]
+    create_indexes(connection, *sorted(indexes, key=lambda index: index.name))
+    # Superseded by (workout_id, order)
+    drop_index(connection, 'workout_exercises', 'ix_workout_exercises_workout_id')
+
+
+@migration('0003_user_stats')
+def user_stats(connection):
+    # Created with every counter and the version column; count every existing user once,
+    # later writes keep the rows up to date
+    from app.models.stats import UserStats
+    from app.utils.counters import reconcile
+    UserStats.__table__.create(connection, checkfirst=True)
+    reconcile(connection)
+
+
+@migration('0004_daily_stats')
+def daily_stats(connection):
+    # The rollup is only maintained by writes made after it exists, so fill it from the history
+    from app.models.stats import DailyStats
+    from app.utils.rollup import rebuild
+    DailyStats.__table__.create(connection, checkfirst=True)
+    rebuild(connection)
+
+
+def pending():
+    """
+    Ids of the migrations not yet applied to the database
+    """
+    schema_migrations.create(db.engine, checkfirst=True)
+    with db.engine.connect() as connection:
+        applied = set(connection.scalars(db.select(schema_migrations.c.id)))
+    return [id for id, _, _ in MIGRATIONS if id not in applied]
+
+
+def upgrade():
+    """
+    Apply pending migrations in order, each recorded once it succeeds. Run by
+    `flask init-db` and `flask migrate`. Returns the ids applied.
+    """
+    todo = pending()
+    for id, function, transactional in MIGRATIONS:
+        if id not in todo:
+            continue
+        if transactional:
+            with db.engine.begin() as connection:
+                function(connection)
+                connection.execute(schema_migrations.insert().values(id=id, applied_at=datetime.utcnow()))
+        else:
+            with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+                function(connection)
+                connection.execute(schema_migrations.insert().values(id=id, applied_at=datetime.utcnow()))
+    return todo
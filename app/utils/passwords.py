@@ -0,0 +1,112 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+
+from flask import current_app
+from werkzeug.security import generate_password_hash, check_password_hash
+
+
+class VerificationBusy(Exception):
+    """
+    Raised when every password verification slot is taken
+    """
+
+
+def hash_password(password):
+    config = current_app.config
+    return generate_password_hash(password, method=config['PASSWORD_HASH_METHOD'],
+                                  salt_length=config['PASSWORD_SALT_LENGTH'])
+
+
+@lru_cache(maxsize=None)
+def method_prefix(method):
+    """
+    The method as werkzeug records it in a hash, e.g. 'scrypt' -> 'scrypt:32768:8:1'
+    """
+    name = method.split(':')[0]
+    if (name == 'scrypt' and method.count(':') == 3) or (name == 'pbkdf2' and method.count(':') == 2):
+        return method
+    # Short form: let werkzeug fill in its defaults (costs one hash per process)
+    return generate_password_hash('', method=method).split('$')[0]
+
+
+def needs_rehash(pwhash):
+    """
+    Whether a stored hash was made with other parameters than PASSWORD_HASH_METHOD
+    and PASSWORD_SALT_LENGTH
+    """
+    config = current_app.config
+    method, _, rest = pwhash.partition('$')
+    salt = rest.partition('$')[0]
+    return method != method_prefix(config['PASSWORD_HASH_METHOD']) or len(salt) != config['PASSWORD_SALT_LENGTH']
+
+
+class PasswordVerifier:
+    """
+    Checks passwords inline, or with PASSWORD_VERIFY_WORKERS > 0 in a bounded
+    process pool so a burst of logins cannot take every CPU from regular
+    requests. At most PASSWORD_VERIFY_MAX_PENDING checks queue for the pool;
+    beyond that VerificationBusy is raised at once rather than tying up the worker.
+    """
+    def __init__(self):
+        self.workers = 0
+        self.timeout = 10
+        self._pool = None
+        self._slots = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.shutdown()
+        self.workers = app.config.get('PASSWORD_VERIFY_WORKERS', 0)
+        self.timeout = app.config.get('PASSWORD_VERIFY_TIMEOUT', 10)
+        pending = app.config.get('PASSWORD_VERIFY_MAX_PENDING', 0) or self.workers * 4
+        self._slots = threading.BoundedSemaphore(self.workers + pending) if self.workers else None
+
+    @property
+    def pool(self):
+        # Created on first use, so gunicorn's preloading master never owns one
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('forkserver'))
+            return self._pool
+
+    def verify(self, pwhash, password):
+        if not self.workers:
+            return check_password_hash(pwhash, password)
+        slots = self._slots
+        if not slots.acquire(blocking=False):
+            raise VerificationBusy()
+        pool = self.pool
+        try:
+            future = pool.submit(check_password_hash, pwhash, password)
+        except (BrokenProcessPool, RuntimeError):
+            slots.release()
+            self._discard(pool)
+            raise VerificationBusy()
+        # The slot stays taken until the check itself ends, even if we stop waiting for it
+        future.add_done_callback(lambda _: slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            raise VerificationBusy()
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM-killed); the pool is unusable, so start a fresh one next time
+            self._discard(pool)
+            raise VerificationBusy()
+
+    def _discard(self, pool):
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+
+password_verifier = PasswordVerifier()
@@ -0,0 +1,57 @@
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+STARTUP_CODE = """
+from app import create_app
+from config import configs
+create_app(configs['production'])
+"""
+
+
+def parse_importtime(output):
+    """
+    (module, self µs, cumulative µs, depth) for each line of -X importtime output
+    """
+    entries = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        entries.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return entries
+
+
+def profile_startup(code=STARTUP_CODE, env=None):
+    """
+    Import-time entries for running code (by default, building the app) in a fresh interpreter
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=ROOT, env=env, capture_output=True, text=True
+    )
+    if result.returncode:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    return parse_importtime(result.stderr)
+
+
+def by_package(entries):
+    """
+    Total self time per top-level package, largest first
+    """
+    totals = defaultdict(int)
+    for name, self_us, _, _ in entries:
+        totals[name.split('.')[0]] += self_us
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)
+
+
+def own_time(entries):
+    """
+    Self time spent importing this project's modules (app.*, config)
+    """
+    return sum(self_us for name, self_us, _, _ in entries
+               if name in ('app', 'config') or name.startswith('app.'))
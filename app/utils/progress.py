@@ -0,0 +1,110 @@
+from collections import Counter, defaultdict
+
+from sqlalchemy import select, update, func, and_, or_, union_all, bindparam
+
+from app import db
+from app.models.goal import Goal
+from app.models.workout import Workout, WorkoutExercise
+from app.models.stats import DailyStats
+from app.utils.counters import adjust
+
+
+def in_window(day):
+    return and_(
+        or_(Goal.start_date.is_(None), day >= Goal.start_date),
+        or_(Goal.end_date.is_(None), day <= Goal.end_date)
+    )
+
+
+def progress_select(*conditions):
+    """
+    SELECT (id, user_id, current_value, target_value, completed, value) for every metric-linked
+    goal matching conditions. All metrics are computed in one statement: each metric is
+    a query grouped by goal, and goals without any matching activity get 0.
+    """
+    def from_rollup(metric, value):
+        return select(Goal.id.label('goal_id'), value.label('value')) \
+            .join(DailyStats, and_(DailyStats.user_id == Goal.user_id, in_window(DailyStats.date))) \
+            .where(Goal.metric == metric, *conditions) \
+            .group_by(Goal.id)
+
+    def from_exercises(metric, value):
+        return select(Goal.id.label('goal_id'), value.label('value')) \
+            .join(Workout, and_(Workout.user_id == Goal.user_id, in_window(Workout.date))) \
+            .join(WorkoutExercise, and_(
+                WorkoutExercise.workout_id == Workout.id,
+                or_(Goal.exercise_id.is_(None), WorkoutExercise.exercise_id == Goal.exercise_id)
+            )) \
+            .where(Goal.metric == metric, *conditions) \
+            .group_by(Goal.id)
+
+    values = union_all(
+        from_rollup('workout_count', func.sum(DailyStats.workout_count)),
+        from_rollup('total_minutes', func.sum(DailyStats.duration)),
+        from_exercises('total_distance', func.sum(WorkoutExercise.distance)),
+        from_exercises('max_weight', func.max(WorkoutExercise.weight)),
+    ).subquery()
+
+    return select(
+        Goal.id,
+        Goal.user_id,
+        Goal.current_value,
+        Goal.target_value,
+        Goal.completed,
+        func.coalesce(values.c.value, 0).label('value')
+    ).outerjoin(values, values.c.goal_id == Goal.id) \
+     .where(Goal.metric.isnot(None), *conditions)
+
+
+def refresh_goals(connection, *conditions):
+    """
+    Recompute current_value of the metric-linked goals matching conditions and mark
+    them completed exactly while they are at or past their target, writing only the
+    goals that changed (and moving them between active and completed in user_stats).
+    Returns the number of goals updated.
+    """
+    changes = []
+    deltas = defaultdict(Counter)
+    for row in connection.execute(progress_select(*conditions)):
+        value = float(row.value)
+        # Deleting or editing workouts can take a goal back below its target
+        completed = row.target_value is not None and value >= row.target_value
+        if value != row.current_value or completed != bool(row.completed):
+            changes.append({'goal_id': row.id, 'value': value, 'reached': completed})
+        if completed != bool(row.completed):
+            step = 1 if completed else -1
+            deltas[row.user_id].update({'active_goal_count': -step, 'completed_goal_count': step})
+
+    if changes:
+        goals = Goal.__table__
+        connection.execute(
+            update(goals).where(goals.c.id == bindparam('goal_id'))
+            .values(current_value=bindparam('value'), completed=bindparam('reached')),
+            changes
+        )
+        adjust(connection, deltas)
+    return len(changes)
+
+
+def refresh_user_goals(connection, user_id, dates):
+    """
+    Refresh a user's metric-linked goals whose window overlaps any of the given dates,
+    called whenever that user's workouts on those dates change
+    """
+    return refresh_goals(
+        connection,
+        Goal.user_id == user_id,
+        or_(Goal.start_date.is_(None), Goal.start_date <= max(dates)),
+        or_(Goal.end_date.is_(None), Goal.end_date >= min(dates))
+    )
+
+
+def recompute_all(user_ids=None):
+    """
+    Recompute every metric-linked goal, for every user or only the given ones,
+    in one grouped pass
+    """
+    conditions = [Goal.user_id.in_(user_ids)] if user_ids else []
+    updated = refresh_goals(db.session.connection(), *conditions)
+    db.session.commit()
+    return updated
@@ -0,0 +1,144 @@
+from collections import defaultdict
+from contextlib import contextmanager
+
+from sqlalchemy import event, func, select, delete, insert, and_, inspect
+
+from app import db
+from app.models.workout import Workout, WorkoutExercise
+from app.models.stats import DailyStats
+from app.utils.progress import refresh_user_goals
+
+
+def rollup_select(*conditions):
+    """
+    SELECT producing daily_stats rows from raw workouts for the workouts matching conditions
+    """
+    workouts = select(
+        Workout.user_id,
+        Workout.date,
+        func.count(Workout.id).label('workout_count'),
+        func.coalesce(func.sum(Workout.duration), 0).label('duration'),
+        func.coalesce(func.sum(Workout.calories_burned), 0).label('calories_burned')
+    ).where(Workout.date.isnot(None), *conditions).group_by(Workout.user_id, Workout.date).subquery()
+
+    exercises = select(
+        Workout.user_id,
+        Workout.date,
+        func.sum(WorkoutExercise.sets * WorkoutExercise.reps * WorkoutExercise.weight).label('volume'),
+        func.sum(WorkoutExercise.distance).label('distance')
+    ).join(WorkoutExercise, WorkoutExercise.workout_id == Workout.id) \
+     .where(Workout.date.isnot(None), *conditions) \
+     .group_by(Workout.user_id, Workout.date).subquery()
+
+    return select(
+        workouts.c.user_id,
+        workouts.c.date,
+        workouts.c.workout_count,
+        workouts.c.duration,
+        workouts.c.calories_burned,
+        func.coalesce(exercises.c.volume, 0),
+        func.coalesce(exercises.c.distance, 0)
+    ).select_from(workouts).outerjoin(exercises, and_(
+        exercises.c.user_id == workouts.c.user_id,
+        exercises.c.date == workouts.c.date
+    ))
+
+
+ROLLUP_COLUMNS = ['user_id', 'date', 'workout_count', 'duration', 'calories_burned', 'volume', 'distance']
+
+
+def refresh_days(connection, keys):
+    """
+    Recompute the daily_stats rows for the given (user_id, date) pairs from raw workouts,
+    then the progress of the metric-linked goals covering those days.
+    Must be called explicitly after bulk statements that bypass the ORM session,
+    together with counters.adjust().
+    """
+    dates_by_user = defaultdict(set)
+    for user_id, day in keys:
+        if user_id is not None and day is not None:
+            dates_by_user[user_id].add(day)
+
+    for user_id, dates in dates_by_user.items():
+        dates = sorted(dates)
+        connection.execute(delete(DailyStats).where(DailyStats.user_id == user_id, DailyStats.date.in_(dates)))
+        connection.execute(insert(DailyStats).from_select(
+            ROLLUP_COLUMNS,
+            rollup_select(Workout.user_id == user_id, Workout.date.in_(dates))
+        ))
+        refresh_user_goals(connection, user_id, dates)
+
+
+def rebuild(connection, user_ids=None):
+    """
+    Replace daily_stats rows with ones recomputed from raw workouts, for every user or
+    only the given ones, in the connection's transaction. Returns the rows written.
+    """
+    conditions = [Workout.user_id.in_(user_ids)] if user_ids else []
+    stale = delete(DailyStats)
+    if user_ids:
+        stale = stale.where(DailyStats.user_id.in_(user_ids))
+    connection.execute(stale)
+    return connection.execute(insert(DailyStats).from_select(ROLLUP_COLUMNS, rollup_select(*conditions))).rowcount
+
+
+def backfill(user_ids=None):
+    """
+    Rebuild daily_stats from scratch, for every user or only the given ones
+    """
+    rows = rebuild(db.session.connection(), user_ids)
+    db.session.commit()
+    return rows
+
+
+def _affected_days(session):
+    keys = set()
+    with session.no_autoflush:
+        for instance in (*session.new, *session.dirty, *session.deleted):
+            if isinstance(instance, Workout):
+                workout = instance
+            elif isinstance(instance, WorkoutExercise):
+                workout = instance.workout or session.get(Workout, instance.workout_id)
+                if workout is None:
+                    continue
+            else:
+                continue
+            keys.add((workout.user_id, workout.date))
+            # A workout moved to another day (or user) also changes the old day
+            state = inspect(workout)
+            old_user_ids = state.attrs.user_id.history.deleted or [workout.user_id]
+            old_dates = state.attrs.date.history.deleted or [workout.date]
+            keys.update((user_id, day) for user_id in old_user_ids for day in old_dates)
+    return keys
+
+
+def register_rollup(session):
+    """
+    Keep daily_stats in step with workouts written through the session, refreshing
+    only the days touched by each flush, inside the same transaction
+    """
+    if not event.contains(session, 'after_flush', _refresh):
+        event.listen(session, 'after_flush', _refresh)
+
+
+@contextmanager
+def deferred(session):
+    """
+    Skip the rollup refresh for flushes inside the block, for callers that write more
+    rows with bulk statements afterwards and then call refresh_days() once themselves
+    """
+    session.info['rollup_deferred'] = True
+    try:
+        yield
+    finally:
+        session.info.pop('rollup_deferred', None)
+
+
+def _refresh(session, flush_context):
+    if session.info.get('rollup_deferred'):
+        return
+    # After the flush the rows are written, while new/dirty/deleted and attribute
+    # history still describe what the flush changed
+    keys = _affected_days(session)
+    if keys:
+        refresh_days(session.connection(), keys)
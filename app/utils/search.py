@@ -0,0 +1,240 @@
+import bisect
+import heapq
+import logging
+import math
+import re
+import threading
+from collections import Counter
+
+from flask import current_app
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app import db
+from app.utils.catalog import exercise_catalog
+
+logger = logging.getLogger('fittrack.search')
+
+TOKEN_RE = re.compile(r'\w+')
+
+# Searchable Exercise columns and their weight in ranking
+FIELD_WEIGHTS = {
+    'name': 10.0,
+    'muscle_groups': 5.0,
+    'description': 2.0,
+    'instructions': 1.0,
+}
+
+FTS5_SETUP = [
+    f"""CREATE VIRTUAL TABLE exercises_fts USING fts5(
+        {', '.join(FIELD_WEIGHTS)}, content='exercises', content_rowid='id'
+    )""",
+    f"""CREATE TRIGGER exercises_fts_ai AFTER INSERT ON exercises BEGIN
+        INSERT INTO exercises_fts(rowid, {', '.join(FIELD_WEIGHTS)})
+        VALUES (new.id, {', '.join('new.' + field for field in FIELD_WEIGHTS)});
+    END""",
+    f"""CREATE TRIGGER exercises_fts_ad AFTER DELETE ON exercises BEGIN
+        INSERT INTO exercises_fts(exercises_fts, rowid, {', '.join(FIELD_WEIGHTS)})
+        VALUES ('delete', old.id, {', '.join('old.' + field for field in FIELD_WEIGHTS)});
+    END""",
+    f"""CREATE TRIGGER exercises_fts_au AFTER UPDATE ON exercises BEGIN
+        INSERT INTO exercises_fts(exercises_fts, rowid, {', '.join(FIELD_WEIGHTS)})
+        VALUES ('delete', old.id, {', '.join('old.' + field for field in FIELD_WEIGHTS)});
+        INSERT INTO exercises_fts(rowid, {', '.join(FIELD_WEIGHTS)})
+        VALUES (new.id, {', '.join('new.' + field for field in FIELD_WEIGHTS)});
+    END""",
+    "INSERT INTO exercises_fts(exercises_fts) VALUES ('rebuild')",
+]
+
+
+def tokenize(value):
+    return TOKEN_RE.findall((value or '').lower())
+
+
+class BM25Index:
+    """
+    Pure-Python BM25 inverted index over the exercise catalog, with field
+    weights and prefix matching on every query term
+    """
+    k1 = 1.2
+    b = 0.75
+
+    def __init__(self, exercises):
+        self.exercises = list(exercises)
+        self.postings = {}
+        lengths = []
+        for doc, exercise in enumerate(self.exercises):
+            weighted = Counter()
+            for field, weight in FIELD_WEIGHTS.items():
+                for term, count in Counter(tokenize(getattr(exercise, field))).items():
+                    weighted[term] += count * weight
+            for term, tf in weighted.items():
+                self.postings.setdefault(term, {})[doc] = tf
+            lengths.append(sum(weighted.values()))
+        self.terms = sorted(self.postings)
+        average_length = (sum(lengths) / len(lengths)) if lengths else 1.0
+        # Per-document length normalisation, precomputed once
+        self.norms = [self.k1 * (1 - self.b + self.b * length / average_length) for length in lengths]
+
+    def expand(self, prefix):
+        start = bisect.bisect_left(self.terms, prefix)
+        for term in self.terms[start:]:
+            if not term.startswith(prefix):
+                break
+            yield term
+
+    def search(self, tokens, offset, limit):
+        count = len(self.exercises)
+        # Score the most selective query term first so later terms only touch its candidates
+        expanded = sorted(
+            ([self.postings[term] for term in self.expand(token)] for token in tokens),
+            key=lambda postings_list: sum(len(postings) for postings in postings_list)
+        )
+        scores = None
+        for postings_list in expanded:
+            token_scores = {}
+            for postings in postings_list:
+                idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                if scores is None:
+                    docs = postings
+                else:
+                    docs = [doc for doc in scores if doc in postings]
+                for doc in docs:
+                    tf = postings[doc]
+                    token_scores[doc] = token_scores.get(doc, 0.0) + idf * tf * (self.k1 + 1) / (tf + self.norms[doc])
+            if scores is None:
+                scores = token_scores
+            else:
+                scores = {doc: score + token_scores[doc] for doc, score in scores.items() if doc in token_scores}
+            if not scores:
+                return 0, []
+
+        ranked = heapq.nlargest(offset + limit, scores.items(), key=lambda item: (item[1], -item[0]))
+        return len(scores), [self.exercises[doc] for doc, _ in ranked[offset:]]
+
+
+class ExerciseSearch:
+    """
+    Ranked exercise search. Uses an SQLite FTS5 table kept in sync by triggers
+    when available, otherwise a BM25 index built from the cached catalog.
+    """
+    def __init__(self):
+        self.configured = 'auto'
+        self._backend = None
+        self._lock = threading.Lock()
+        # (catalog version it was built from, BM25Index), swapped as a whole
+        self._index = None
+        self._building = None
+
+    def init_app(self, app):
+        self.configured = app.config.get('EXERCISE_SEARCH_BACKEND', 'auto')
+        self._backend = None
+        self._index = None
+        self._building = None
+
+    @property
+    def backend(self):
+        """
+        'fts5' once `flask init-db` has created the FTS5 table, else 'bm25';
+        detected on first use so app startup issues no queries
+        """
+        if self._backend is None:
+            backend = 'bm25'
+            if self.configured in ('auto', 'fts5') and db.engine.dialect.name == 'sqlite':
+                exists = db.session.execute(
+                    text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'exercises_fts'")
+                ).first()
+                if exists:
+                    backend = 'fts5'
+            self._backend = backend
+        return self._backend
+
+    def create_index(self):
+        """
+        Create the FTS5 table and its sync triggers when configured and supported
+        (part of `flask init-db`)
+        """
+        self._backend = None
+        if self.configured in ('auto', 'fts5') and db.engine.dialect.name == 'sqlite':
+            try:
+                self.setup_fts5()
+            except OperationalError:
+                db.session.rollback()
+                if self.configured == 'fts5':
+                    raise
+
+    def setup_fts5(self):
+        exists = db.session.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'exercises_fts'")
+        ).first()
+        if exists:
+            return
+        for statement in FTS5_SETUP:
+            db.session.execute(text(statement))
+        db.session.commit()
+
+    def search(self, query, page=1, per_page=20):
+        """
+        Returns (total matches, exercises on the requested page)
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return 0, []
+        offset = (page - 1) * per_page
+
+        if self.backend == 'fts5':
+            match = ' '.join(f'"{token}"*' for token in tokens)
+            total = db.session.execute(
+                text('SELECT count(*) FROM exercises_fts WHERE exercises_fts MATCH :match'),
+                {'match': match}
+            ).scalar()
+            ids = db.session.execute(
+                text(f"""SELECT rowid FROM exercises_fts WHERE exercises_fts MATCH :match
+                         ORDER BY bm25(exercises_fts, {', '.join(map(str, FIELD_WEIGHTS.values()))}), rowid
+                         LIMIT :limit OFFSET :offset"""),
+                {'match': match, 'limit': per_page, 'offset': offset}
+            ).scalars().all()
+            exercises = [exercise_catalog.get(exercise_id) for exercise_id in ids]
+            return total, [exercise for exercise in exercises if exercise]
+
+        return self.bm25_index().search(tokens, offset, per_page)
+
+    def bm25_index(self):
+        """
+        BM25 index of the current catalog. After a catalog change the previous
+        index keeps answering while a background thread reloads the catalog and
+        builds the new one; only a process's very first search builds inline.
+        """
+        version = exercise_catalog.latest_version()
+        current = self._index
+        if current is not None and current[0] == version:
+            return current[1]
+        with self._lock:
+            current = self._index
+            if current is None:
+                version = exercise_catalog.version
+                self._index = current = (version, BM25Index(exercise_catalog.all()))
+            elif current[0] != version and self._building != version:
+                self._building = version
+                app = current_app._get_current_object()
+                threading.Thread(target=self._build, args=(app, version), daemon=True).start()
+            return current[1]
+
+    def _build(self, app, version):
+        index = None
+        try:
+            with app.app_context():
+                loaded = exercise_catalog.version
+                index = BM25Index(exercise_catalog.all())
+        except Exception:
+            # The previous index keeps serving; the next search after this retries the build
+            logger.exception('Rebuilding the exercise search index failed')
+        finally:
+            with self._lock:
+                if self._building == version:
+                    if index is not None:
+                        self._index = (loaded, index)
+                    self._building = None
+
+
+exercise_search = ExerciseSearch()
@@ -1,90 +1,369 @@
+import csv
+import io
+import itertools
+import math
+import multiprocessing
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import create_engine, event, func, insert
+
 from app import db
 from app.models.exercise import Exercise
 
+SEED_EXERCISES = [
+    {
+        'name': 'Bench Press',
+        'description': 'A compound exercise that primarily targets the chest muscles.',
+        'muscle_groups': 'Chest, Triceps, Shoulders',
+        'equipment': 'Barbell, Bench',
+        'image_url': 'https://images.unsplash.com/photo-1571019613454-1cb2f99b2d8b?w=600&auto=format&fit=crop&q=80',
+        'difficulty': 'Intermediate',
+        'instructions': 'Lie on a bench, grip the bar, lower it to your chest, then press up.'
+    },
+    {
+        'name': 'Deadlift',
+        'description': 'A compound exercise that works multiple muscle groups including the back, legs, and core.',
+        'muscle_groups': 'Back, Legs, Core',
+        'equipment': 'Barbell',
+        'image_url': 'https://images.unsplash.com/photo-1598575285675-d0d3d0358e55?w=600&auto=format&fit=crop&q=80',
+        'difficulty': 'Advanced',
+        'instructions': 'Stand with feet shoulder-width apart, bend at hips and knees, grip the bar, then stand up.'
+    },
+    {
+        'name': 'Squat',
+        'description': 'A fundamental compound exercise that targets the legs and glutes.',
+        'muscle_groups': 'Quadriceps, Hamstrings, Glutes',
+        'equipment': 'Barbell, Squat Rack',
+        'image_url': 'https://images.unsplash.com/photo-1574680096145-d58b7ac5f611?w=600&auto=format&fit=crop&q=80',
+        'difficulty': 'Intermediate',
+        'instructions': 'Position bar on shoulders, feet shoulder-width apart, bend knees and hips, lower until thighs are parallel to ground, then stand up.'
+    },
+    {
+        'name': 'Pull-up',
+        'description': 'An upper body exercise that targets the back and biceps.',
+        'muscle_groups': 'Back, Biceps',
+        'equipment': 'Pull-up Bar',
+        'image_url': 'https://images.unsplash.com/photo-1598971639058-efc302d5704b?w=600&auto=format&fit=crop&q=80',
+        'difficulty': 'Intermediate',
+        'instructions': 'Grip the bar with hands shoulder-width apart, pull yourself up until chin is over the bar, then lower.'
+    },
+    {
+        'name': 'Overhead Press',
+        'description': 'A shoulder exercise that also engages the triceps and upper chest.',
+        'muscle_groups': 'Shoulders, Triceps',
+        'equipment': 'Barbell, Dumbbells',
+        'image_url': 'https://images.unsplash.com/photo-1541534741688-6078c6bfb5c5?w=600&auto=format&fit=crop&q=80',
+        'difficulty': 'Intermediate',
+        'instructions': 'Stand with feet shoulder-width apart, hold weight at shoulder level, press overhead, then lower.'
+    },
+    {
+        'name': 'Dumbbell Row',
+        'description': 'A back exercise that also works the biceps and shoulders.',
+        'muscle_groups': 'Back, Biceps',
+        'equipment': 'Dumbbells, Bench',
+        'image_url': 'https://images.unsplash.com/photo-1603287681836-b174ce5074c2?w=600&auto=format&fit=crop&q=80',
+        'difficulty': 'Beginner',
+        'instructions': 'Place one knee and hand on bench, other foot on floor, pull dumbbell up to side, then lower.'
+    },
+    {
+        'name': 'Lunges',
+        'description': 'A leg exercise that targets the quadriceps, hamstrings, and glutes.',
+        'muscle_groups': 'Quadriceps, Hamstrings, Glutes',
+        'equipment': 'None, Dumbbells (optional)',
+        'image_url': 'https://images.unsplash.com/photo-1434682881908-b43d0467b798?w=600&auto=format&fit=crop&q=80',
+        'difficulty': 'Beginner',
+        'instructions': 'Stand with feet together, step forward with one leg, lower until both knees are bent at 90 degrees, then push back up.'
+    },
+    {
+        'name': 'Plank',
+        'description': 'A core exercise that also engages the shoulders and back.',
+        'muscle_groups': 'Core, Shoulders',
+        'equipment': 'None',
+        'image_url': 'https://images.unsplash.com/photo-1566241134883-13eb2393a3cc?w=600&auto=format&fit=crop&q=80',
+        'difficulty': 'Beginner',
+        'instructions': 'Position forearms on ground, elbows under shoulders, feet hip-width apart, hold body in straight line.'
+    }
+]
+
 def seed_exercises():
     """
-    Seed the database with initial exercise data if none exists
-    """
-    # Only run if there are no exercises in the database
-    if Exercise.query.count() == 0:
-        exercises = [
-            {
-                'name': 'Bench Press',
-                'description': 'A compound exercise that primarily targets the chest muscles.',
-                'muscle_groups': 'Chest, Triceps, Shoulders',
-                'equipment': 'Barbell, Bench',
-                'image_url': 'https://images.unsplash.com/photo-1571019613454-1cb2f99b2d8b?w=600&auto=format&fit=crop&q=80',
-                'difficulty': 'Intermediate',
-                'instructions': 'Lie on a bench, grip the bar, lower it to your chest, then press up.'
-            },
-            {
-                'name': 'Deadlift',
-                'description': 'A compound exercise that works multiple muscle groups including the back, legs, and core.',
-                'muscle_groups': 'Back, Legs, Core',
-                'equipment': 'Barbell',
-                'image_url': 'https://images.unsplash.com/photo-1598575285675-d0d3d0358e55?w=600&auto=format&fit=crop&q=80',
-                'difficulty': 'Advanced',
-                'instructions': 'Stand with feet shoulder-width apart, bend at hips and knees, grip the bar, then stand up.'
-            },
-            {
-                'name': 'Squat',
-                'description': 'A fundamental compound exercise that targets the legs and glutes.',
-                'muscle_groups': 'Quadriceps, Hamstrings, Glutes',
-                'equipment': 'Barbell, Squat Rack',
-                'image_url': 'https://images.unsplash.com/photo-1574680096145-d58b7ac5f611?w=600&auto=format&fit=crop&q=80',
-                'difficulty': 'Intermediate',
-                'instructions': 'Position bar on shoulders, feet shoulder-width apart, bend knees and hips, lower until thighs are parallel to ground, then stand up.'
-            },
-            {
-                'name': 'Pull-up',
-                'description': 'An upper body exercise that targets the back and biceps.',
-                'muscle_groups': 'Back, Biceps',
-                'equipment': 'Pull-up Bar',
-                'image_url': 'https://images.unsplash.com/photo-1598971639058-efc302d5704b?w=600&auto=format&fit=crop&q=80',
-                'difficulty': 'Intermediate',
-                'instructions': 'Grip the bar with hands shoulder-width apart, pull yourself up until chin is over the bar, then lower.'
-            },
-            {
-                'name': 'Overhead Press',
-                'description': 'A shoulder exercise that also engages the triceps and upper chest.',
-                'muscle_groups': 'Shoulders, Triceps',
-                'equipment': 'Barbell, Dumbbells',
-                'image_url': 'https://images.unsplash.com/photo-1541534741688-6078c6bfb5c5?w=600&auto=format&fit=crop&q=80',
-                'difficulty': 'Intermediate',
-                'instructions': 'Stand with feet shoulder-width apart, hold weight at shoulder level, press overhead, then lower.'
-            },
-            {
-                'name': 'Dumbbell Row',
-                'description': 'A back exercise that also works the biceps and shoulders.',
-                'muscle_groups': 'Back, Biceps',
-                'equipment': 'Dumbbells, Bench',
-                'image_url': 'https://images.unsplash.com/photo-1603287681836-b174ce5074c2?w=600&auto=format&fit=crop&q=80',
-                'difficulty': 'Beginner',
-                'instructions': 'Place one knee and hand on bench, other foot on floor, pull dumbbell up to side, then lower.'
-            },
-            {
-                'name': 'Lunges',
-                'description': 'A leg exercise that targets the quadriceps, hamstrings, and glutes.',
-                'muscle_groups': 'Quadriceps, Hamstrings, Glutes',
-                'equipment': 'None, Dumbbells (optional)',
-                'image_url': 'https://images.unsplash.com/photo-1434682881908-b43d0467b798?w=600&auto=format&fit=crop&q=80',
-                'difficulty': 'Beginner',
-                'instructions': 'Stand with feet together, step forward with one leg, lower until both knees are bent at 90 degrees, then push back up.'
-            },
-            {
-                'name': 'Plank',
-                'description': 'A core exercise that also engages the shoulders and back.',
-                'muscle_groups': 'Core, Shoulders',
-                'equipment': 'None',
-                'image_url': 'https://images.unsplash.com/photo-1566241134883-13eb2393a3cc?w=600&auto=format&fit=crop&q=80',
-                'difficulty': 'Beginner',
-                'instructions': 'Position forearms on ground, elbows under shoulders, feet hip-width apart, hold body in straight line.'
-            }
-        ]
-        
-        for exercise_data in exercises:
-            exercise = Exercise(**exercise_data)
-            db.session.add(exercise)
-        
+    Add the built-in exercises that are missing (matched by name) with one bulk insert.
+    Safe to run repeatedly; exercises that already exist are left as they are.
+    """
+    names = [exercise['name'] for exercise in SEED_EXERCISES]
+    existing = set(db.session.scalars(db.select(Exercise.name).where(Exercise.name.in_(names))))
+    missing = [exercise for exercise in SEED_EXERCISES if exercise['name'] not in existing]
+    if missing:
+        db.session.execute(insert(Exercise), missing)
+        db.session.commit()
+    return len(missing)
+
+
+# Synthetic data generation (`flask generate-data`)
+
+MOVEMENTS = ['Press', 'Row', 'Squat', 'Lunge', 'Curl', 'Extension', 'Raise', 'Fly', 'Pulldown',
+             'Deadlift', 'Thrust', 'Carry', 'Crunch', 'Plank', 'Run', 'Ride', 'Swim', 'Jump']
+VARIATIONS = ['Incline', 'Decline', 'Seated', 'Standing', 'Single-Arm', 'Wide-Grip', 'Close-Grip',
+              'Paused', 'Tempo', 'Sumo', 'Reverse', 'Alternating', 'Explosive', 'Isometric']
+EQUIPMENT = ['Barbell', 'Dumbbell', 'Kettlebell', 'Cable', 'Machine', 'Band', 'Bodyweight']
+MUSCLE_GROUPS = ['Chest', 'Back', 'Shoulders', 'Biceps', 'Triceps', 'Quadriceps', 'Hamstrings',
+                 'Glutes', 'Calves', 'Core', 'Cardiovascular']
+DIFFICULTIES = ['Beginner', 'Intermediate', 'Advanced']
+WORKOUT_TYPES = ['strength', 'strength', 'strength', 'cardio', 'cardio', 'hiit', 'flexibility', 'other']
+GOAL_UNITS = {None: 'units', 'workout_count': 'workouts', 'total_minutes': 'minutes',
+              'total_distance': 'km', 'max_weight': 'kg'}
+
+
+@dataclass
+class GenerationPlan:
+    """
+    Dataset shape for generate(). Workouts per user follow a log-normal distribution
+    with the given mean (spread is its sigma; 0 gives every user the same count),
+    exercises per workout and goals per user are uniform around their means, and
+    exercises are picked with Zipf-like popularity (skew 0 is uniform).
+    """
+    users: int = 1000
+    workouts_per_user: float = 100
+    workout_spread: float = 0.8
+    exercises_per_workout: float = 5
+    goals_per_user: float = 4
+    history_days: int = 730
+    popularity_skew: float = 1.0
+    seed: int = 1
+
+
+def seed_catalog(count, seed=1):
+    """
+    Add `count` synthetic exercises to the catalog with one bulk insert; returns the count
+    """
+    rng = random.Random(seed)
+    start = db.session.scalar(db.select(func.count(Exercise.id)))
+    rows = []
+    for n in range(count):
+        movement = rng.choice(MOVEMENTS)
+        rows.append({
+            'name': f'{rng.choice(VARIATIONS)} {rng.choice(EQUIPMENT)} {movement} {start + n + 1}',
+            'description': f'Synthetic {movement.lower()} variation.',
+            'muscle_groups': ', '.join(rng.sample(MUSCLE_GROUPS, rng.randint(1, 3))),
+            'equipment': rng.choice(EQUIPMENT),
+            'difficulty': rng.choice(DIFFICULTIES),
+        })
+    if rows:
+        db.session.execute(insert(Exercise), rows)
+        db.session.commit()
+    return len(rows)
+
+
+def copy_rows(connection, table, columns, rows):
+    """
+    Write tuples of `columns` values into `table` by the fastest path the driver
+    offers: COPY FROM STDIN on PostgreSQL (psycopg or psycopg2), otherwise one
+    driver-level executemany with the column types' bind processors applied
+    """
+    dialect = connection.dialect
+    quote = dialect.identifier_preparer.quote
+    names = ', '.join(quote(column) for column in columns)
+    raw = connection.connection.dbapi_connection
+
+    if dialect.name == 'postgresql' and dialect.driver in ('psycopg', 'psycopg2'):
+        cursor = raw.cursor()
+        try:
+            if dialect.driver == 'psycopg':
+                with cursor.copy(f'COPY {table.name} ({names}) FROM STDIN') as copy:
+                    for row in rows:
+                        copy.write_row(row)
+            else:
+                # Unquoted empty fields are NULL in CSV COPY
+                buffer = io.StringIO()
+                csv.writer(buffer).writerows(rows)
+                buffer.seek(0)
+                cursor.copy_expert(f'COPY {table.name} ({names}) FROM STDIN WITH (FORMAT csv)', buffer)
+        finally:
+            cursor.close()
+        return
+
+    processors = [(index, table.c[column].type.bind_processor(dialect)) for index, column in enumerate(columns)]
+    processors = [(index, process) for index, process in processors if process is not None]
+    if processors:
+        rows = [list(row) for row in rows]
+        for row in rows:
+            for index, process in processors:
+                row[index] = process(row[index])
+    marker = '?' if dialect.paramstyle == 'qmark' else '%s'
+    connection.exec_driver_sql(
+        f'INSERT INTO {table.name} ({names}) VALUES ({", ".join([marker] * len(columns))})',
+        [tuple(row) for row in rows]
+    )
+
+
+_engines = {}
+
+
+def worker_engine(url, pragmas):
+    """
+    One engine per worker process and database
+    """
+    if url not in _engines:
+        engine = create_engine(url)
+        if engine.dialect.name == 'sqlite' and pragmas:
+            from app.utils.database import pragma_setter
+            event.listen(engine, 'connect', pragma_setter(pragmas))
+        _engines[url] = engine
+    return _engines[url]
+
+
+def generate_chunk(url, pragmas, plan, chunk, first_user_id, first_workout_id, workout_counts,
+                   exercise_ids, password_hash, batch_size):
+    """
+    Generate and write one chunk of users with all their workouts, workout exercises
+    and goals. User and workout ids are assigned by the caller so chunks can be written
+    in parallel. Returns {table: rows written}.
+    """
+    from app.models.goal import Goal, GOAL_METRICS
+    from app.models.user import User
+    from app.models.workout import Workout, WorkoutExercise
+
+    rng = random.Random(plan.seed * 1000003 + chunk)
+    weights = [1 / (rank + 1) ** plan.popularity_skew for rank in range(len(exercise_ids))]
+    cum_weights = list(itertools.accumulate(weights))
+    metrics = [None] + list(GOAL_METRICS)
+    today = date.today()
+    now = datetime.utcnow()
+    max_exercises = max(1, round(2 * plan.exercises_per_workout) - 1)
+    max_goals = round(2 * plan.goals_per_user)
+    counts = {'users': 0, 'workouts': 0, 'workout_exercises': 0, 'goals': 0}
+
+    tables = {
+        'users': (User.__table__, ['id', 'username', 'name', 'password_hash', 'created_at']),
+        'workouts': (Workout.__table__, ['id', 'user_id', 'name', 'date', 'duration', 'type',
+                                         'calories_burned', 'created_at']),
+        'workout_exercises': (WorkoutExercise.__table__, ['workout_id', 'exercise_id', 'sets', 'reps',
+                                                          'weight', 'duration', 'distance', 'order']),
+        'goals': (Goal.__table__, ['user_id', 'name', 'type', 'metric', 'exercise_id', 'target_value',
+                                   'current_value', 'unit', 'start_date', 'completed', 'created_at']),
+    }
+    pending = {table: [] for table in tables}
+
+    with worker_engine(url, pragmas).connect() as connection:
+        def flush(force=False):
+            # Tables are written parents first, so foreign keys always resolve
+            if not force and max(len(rows) for rows in pending.values()) < batch_size:
+                return
+            for table, rows in pending.items():
+                if rows:
+                    copy_rows(connection, *tables[table], rows)
+                    counts[table] += len(rows)
+                    pending[table] = []
+            connection.commit()
+
+        workout_id = first_workout_id
+        for offset, workout_count in enumerate(workout_counts):
+            user_id = first_user_id + offset
+            joined = now - timedelta(days=plan.history_days)
+            pending['users'].append((user_id, f'synthetic-{user_id}', f'Synthetic User {user_id}',
+                                     password_hash, joined))
+
+            days = sorted(rng.randrange(plan.history_days) for _ in range(workout_count))
+            for day in days:
+                workout_date = today - timedelta(days=plan.history_days - 1 - day)
+                workout_type = rng.choice(WORKOUT_TYPES)
+                pending['workouts'].append((workout_id, user_id, f'{workout_type.title()} session', workout_date,
+                                            rng.randint(20, 90), workout_type, rng.randint(150, 800),
+                                            datetime.combine(workout_date, datetime.min.time())))
+                cardio = workout_type == 'cardio'
+                picks = rng.choices(exercise_ids, cum_weights=cum_weights, k=rng.randint(1, max_exercises))
+                for order, exercise_id in enumerate(picks):
+                    pending['workout_exercises'].append((
+                        workout_id, exercise_id, rng.randint(2, 5), rng.randint(3, 15),
+                        None if cardio else round(rng.uniform(5, 180), 1),
+                        rng.randint(300, 3600) if cardio else None,
+                        round(rng.uniform(1, 15), 2) if cardio else None,
+                        order,
+                    ))
+                workout_id += 1
+
+            for n in range(rng.randint(0, max_goals)):
+                metric = rng.choice(metrics)
+                pending['goals'].append((
+                    user_id, f'Goal {n + 1}', rng.choice(WORKOUT_TYPES), metric,
+                    rng.choice(exercise_ids) if metric in ('total_distance', 'max_weight') else None,
+                    float(rng.randint(10, 1000)), 0.0, GOAL_UNITS[metric],
+                    today - timedelta(days=rng.randrange(plan.history_days)), False, now,
+                ))
+            flush()
+        flush(force=True)
+    return counts
+
+
+def workout_counts(plan):
+    """
+    Workouts per user, drawn from a log-normal with the plan's mean and spread
+    """
+    rng = random.Random(plan.seed)
+    if not plan.workout_spread:
+        return [round(plan.workouts_per_user)] * plan.users
+    mu = math.log(max(plan.workouts_per_user, 1e-9)) - plan.workout_spread ** 2 / 2
+    return [round(rng.lognormvariate(mu, plan.workout_spread)) for _ in range(plan.users)]
+
+
+def generate(plan, workers=1, chunk_size=500, batch_size=10000, password='password', progress=None):
+    """
+    Write a synthetic dataset described by `plan`, `chunk_size` users per task spread
+    over `workers` processes (inline when 1). Rollups and goal progress are left for the
+    caller to rebuild. Returns ({table: rows}, seconds); `progress` is called with
+    ({table: rows} so far, seconds) after each chunk.
+    """
+    from app.models.user import User
+    from app.models.workout import Workout
+    from app.utils.passwords import hash_password
+
+    url = db.engine.url.render_as_string(hide_password=False)
+    pragmas = current_app.config.get('SQLITE_PRAGMAS') or {}
+    exercise_ids = db.session.scalars(db.select(Exercise.id).order_by(Exercise.id)).all()
+    if not exercise_ids:
+        raise ValueError('the exercise catalog is empty; run flask init-db first')
+    first_user_id = (db.session.scalar(db.select(func.max(User.id))) or 0) + 1
+    first_workout_id = (db.session.scalar(db.select(func.max(Workout.id))) or 0) + 1
+    password_hash = hash_password(password)
+    db.session.commit()
+
+    # Shuffle so the most popular exercises are not simply the oldest ones
+    random.Random(plan.seed).shuffle(exercise_ids)
+    per_user = workout_counts(plan)
+    tasks = []
+    for chunk, start in enumerate(range(0, plan.users, chunk_size)):
+        counts = per_user[start:start + chunk_size]
+        tasks.append((url, pragmas, plan, chunk, first_user_id + start, first_workout_id, counts,
+                      exercise_ids, password_hash, batch_size))
+        first_workout_id += sum(counts)
+
+    totals = {'users': 0, 'workouts': 0, 'workout_exercises': 0, 'goals': 0}
+    started = time.perf_counter()
+
+    def done(counts):
+        for table, rows in counts.items():
+            totals[table] += rows
+        if progress:
+            progress(dict(totals), time.perf_counter() - started)
+
+    if workers <= 1:
+        for task in tasks:
+            done(generate_chunk(*task))
+    else:
+        with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('forkserver')) as pool:
+            for future in as_completed([pool.submit(generate_chunk, *task) for task in tasks]):
+                done(future.result())
+
+    if db.engine.dialect.name == 'postgresql':
+        # Ids were assigned explicitly; move the sequences past them
+        for table in ('users', 'workouts'):
+            db.session.execute(db.text(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT max(id) FROM {table}))"
+            ))
         db.session.commit()
-        print("Database seeded with initial exercises.")
\ No newline at end of file
+    return totals, time.perf_counter() - started
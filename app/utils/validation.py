@@ -0,0 +1,17 @@
+def number(value, kind, field):
+    """
+    A non-negative int or float parsed from a JSON or CSV value, None when blank,
+    else ValueError naming the field
+    """
+    if value is None or value == '':
+        return None
+    # JSON true/false would pass as 1/0 since bool is a subclass of int
+    if isinstance(value, bool):
+        raise ValueError(f'{field} must be a number')
+    try:
+        result = kind(value)
+    except (TypeError, ValueError):
+        raise ValueError(f'{field} must be a number')
+    if result < 0:
+        raise ValueError(f'{field} must not be negative')
+    return result
@@ -0,0 +1,79 @@
+"""
+Analytics endpoint latency over ten years of synthetic daily training for one user.
+
+    python -m benchmarks.analytics [years]
+"""
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+from benchmarks.common import make_app, login_client
+from app import db
+from app.models.workout import Workout, WorkoutExercise
+from app.utils.rollup import backfill
+
+ENDPOINTS = [
+    '/api/analytics/volume?bucket=day',
+    '/api/analytics/volume?bucket=week',
+    '/api/analytics/volume?bucket=month&exerciseId=1',
+    '/api/analytics/records',
+    '/api/analytics/trends?bucket=day',
+    '/api/analytics/trends?bucket=week',
+    '/api/analytics/trends?bucket=month',
+]
+
+
+def populate(user_id, years, seed=11):
+    rng = random.Random(seed)
+    first_day = date.today() - timedelta(days=365 * years)
+    workouts = [{
+        'user_id': user_id,
+        'name': f'Session {day}',
+        'date': first_day + timedelta(days=day),
+        'duration': rng.randint(20, 90),
+        'type': rng.choice(['strength', 'cardio', 'hiit']),
+        'calories_burned': rng.randint(150, 800),
+    } for day in range(365 * years)]
+    db.session.execute(db.insert(Workout), workouts)
+
+    workout_ids = db.session.scalars(db.select(Workout.id).where(Workout.user_id == user_id)).all()
+    exercises = [{
+        'workout_id': workout_id,
+        'exercise_id': rng.randint(1, 8),
+        'sets': rng.randint(2, 5),
+        'reps': rng.randint(3, 12),
+        'weight': round(rng.uniform(10, 150), 1),
+        'distance': rng.choice([None, None, round(rng.uniform(1, 10), 2)]),
+        'order': order,
+    } for workout_id in workout_ids for order in range(5)]
+    db.session.execute(db.insert(WorkoutExercise), exercises)
+    db.session.commit()
+    return len(workouts), len(exercises)
+
+
+def main():
+    years = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    app = make_app()
+    client = login_client(app)
+
+    with app.app_context():
+        workouts, exercises = populate(1, years)
+        start = time.perf_counter()
+        days = backfill()
+        print(f'{workouts} workouts, {exercises} workout exercises; '
+              f'backfilled {days} rollup days in {(time.perf_counter() - start) * 1000:.0f} ms')
+
+    for endpoint in ENDPOINTS:
+        runs = []
+        for _ in range(10):
+            start = time.perf_counter()
+            response = client.get(endpoint)
+            runs.append(time.perf_counter() - start)
+        assert response.status_code == 200, response.status_code
+        runs.sort()
+        print(f'{endpoint:50} {len(response.get_json()):5} rows  median {runs[5] * 1000:7.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
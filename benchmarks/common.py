@@ -0,0 +1,154 @@
+import atexit
+import os
+import random
+import tempfile
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+from sqlalchemy import event
+
+from config import Config
+from app import create_app, db
+from app.utils.database import init_database
+
+
+class BenchmarkConfig(Config):
+    TESTING = True
+    WTF_CSRF_ENABLED = False
+
+
+def make_app(config_class=BenchmarkConfig):
+    """
+    Build an app against a fresh temporary SQLite database
+    """
+    handle, path = tempfile.mkstemp(prefix='fittrack-bench-', suffix='.db')
+    os.close(handle)
+    atexit.register(os.remove, path)
+
+    class TempConfig(config_class):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{path}'
+
+    app = create_app(TempConfig)
+    with app.app_context():
+        init_database()
+    return app
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+
+@contextmanager
+def count_queries(app):
+    """
+    Count the SQL statements issued inside the block
+    """
+    counter = QueryCounter()
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', counter)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, 'before_cursor_execute', counter)
+
+
+def login_client(app, username='bench', password='benchmark'):
+    """
+    A test client logged in as a freshly registered user
+    """
+    client = app.test_client()
+    client.post('/api/auth/register', json={
+        'username': username,
+        'name': username.title(),
+        'password': password
+    })
+    return client
+
+
+def create_workout(client, exercise_count, days_ago=0):
+    response = client.post('/api/workouts', json={
+        'name': f'Workout {days_ago}',
+        'date': (date.today() - timedelta(days=days_ago)).isoformat(),
+        'duration': 45,
+        'caloriesBurned': 300,
+        'exercises': [
+            {'exerciseId': (i % 8) + 1, 'sets': 3, 'reps': 10, 'weight': 40.0, 'order': i}
+            for i in range(exercise_count)
+        ]
+    })
+    return response.get_json()['id']
+
+
+def populate_history(user_ids, workouts, exercises_per_workout=5, goals=20, seed=7):
+    """
+    Bulk insert synthetic training history for existing users: `workouts` workouts each
+    (about two a day, going back from today), `exercises_per_workout` exercises per workout
+    and `goals` goals, a quarter of them manual and the rest tracking a progress metric.
+    Rollups and goal progress are rebuilt afterwards.
+    """
+    from app.models.workout import Workout, WorkoutExercise
+    from app.models.goal import Goal, GOAL_METRICS
+    from app.utils.catalog import exercise_catalog
+    from app.utils.counters import reconcile
+    from app.utils.progress import recompute_all
+    from app.utils.rollup import backfill
+
+    rng = random.Random(seed)
+    exercise_ids = [exercise.id for exercise in exercise_catalog.all()]
+    metrics = [None] + list(GOAL_METRICS)
+    today = date.today()
+    counts = {'workouts': 0, 'workout_exercises': 0, 'goals': 0}
+
+    for user_id in user_ids:
+        db.session.execute(db.insert(Workout), [{
+            'user_id': user_id,
+            'name': f'Session {n}',
+            'date': today - timedelta(days=n // 2),
+            'duration': rng.randint(20, 90),
+            'type': rng.choice(['strength', 'cardio', 'hiit', 'flexibility']),
+            'calories_burned': rng.randint(150, 800),
+        } for n in range(workouts)])
+        workout_ids = db.session.scalars(db.select(Workout.id).where(Workout.user_id == user_id)).all()
+        exercise_rows = [{
+            'workout_id': workout_id,
+            'exercise_id': rng.choice(exercise_ids),
+            'sets': rng.randint(2, 5),
+            'reps': rng.randint(3, 12),
+            'weight': round(rng.uniform(10, 150), 1),
+            'distance': rng.choice([None, None, round(rng.uniform(1, 10), 2)]),
+            'order': order,
+        } for workout_id in workout_ids for order in range(exercises_per_workout)]
+        if exercise_rows:
+            db.session.execute(db.insert(WorkoutExercise), exercise_rows)
+        goal_rows = []
+        for n in range(goals):
+            metric = metrics[n % len(metrics)]
+            goal_rows.append({
+                'user_id': user_id,
+                'name': f'Goal {n}',
+                'type': 'other',
+                'metric': metric,
+                'exercise_id': rng.choice(exercise_ids) if metric in ('total_distance', 'max_weight') else None,
+                'target_value': float(rng.randint(10, 500)),
+                'current_value': 0.0,
+                'unit': 'units',
+                'start_date': today - timedelta(days=rng.randint(0, workouts // 2)),
+                'completed': False,
+            })
+        if goal_rows:
+            db.session.execute(db.insert(Goal), goal_rows)
+        db.session.commit()
+        counts['workouts'] += len(workout_ids)
+        counts['workout_exercises'] += len(exercise_rows)
+        counts['goals'] += len(goal_rows)
+
+    backfill(user_ids)
+    recompute_all(user_ids)
+    reconcile(db.session.connection(), user_ids)
+    db.session.commit()
+    return counts
@@ -0,0 +1,327 @@
+"""
+Query count and p95 latency budgets for every route in the main, auth, exercises,
+workouts and goals blueprints, against a database of synthetic users with years of history.
+
+    python -m benchmarks.endpoints [workouts per user] [users] [runs per route]
+
+Each route is requested `runs` times by a logged-in test client (or an anonymous one,
+for the auth pages). Objects a request destroys or consumes are created before each run,
+outside the measurement. Exits non-zero when a route goes over its query or latency
+budget, answers with an unexpected status, or has no entry in ROUTES.
+"""
+import gc
+import itertools
+import string
+import sys
+import time
+from datetime import date
+
+from benchmarks.common import BenchmarkConfig, make_app, login_client, create_workout, count_queries, populate_history
+from app import db
+from app.models.user import User
+from app.utils.passwords import hash_password
+
+BLUEPRINTS = ('main', 'auth', 'exercises', 'workouts', 'goals')
+PASSWORD = 'benchmark'
+TODAY = date.today().isoformat()
+
+
+class EndpointConfig(BenchmarkConfig):
+    # Outlive a whole run, so an expiry does not add a user query to whichever request hits it
+    USER_CACHE_TTL = 3600
+
+
+class Route:
+    """
+    One request to measure. `url` and `json`/`data` may refer to fixtures by name
+    (see Fixtures); `client` is 'user' (the populated user), 'anonymous' or 'fresh'
+    (a newly registered user, for requests that end the session).
+    """
+
+    def __init__(self, endpoint, method, url, max_queries, p95_ms, status=200,
+                 json=None, data=None, client='user'):
+        self.endpoint = endpoint
+        self.method = method
+        self.url = url
+        self.max_queries = max_queries
+        self.p95_ms = p95_ms
+        self.status = status
+        self.json = json
+        self.data = data
+        self.client = client
+
+
+# Budgets are for the default scale (10 users x 2000 workouts) on one CPU:
+# endpoint, method, url, max queries per request, p95 latency in ms
+# Workout and goal writes include UPDATEs of user_stats (counters and version; bulk exercise
+# writes adjust exercise_count separately), and allow one more for when they complete a goal
+ROUTES = [
+    # main
+    Route('main.index', 'GET', '/', 0, 20, status=302),
+    Route('main.dashboard', 'GET', '/dashboard', 1, 100),
+    Route('main.profile', 'GET', '/profile', 1, 50),
+    Route('main.api_export', 'GET', '/api/export?format=ndjson', 3, 600),
+
+    # auth
+    Route('auth.login', 'GET', '/login', 0, 30, client='anonymous'),
+    Route('auth.login', 'POST', '/login', 1, 300, status=302, client='anonymous',
+          data={'username': 'bench', 'password': PASSWORD}),
+    Route('auth.register', 'GET', '/register', 0, 30, client='anonymous'),
+    Route('auth.register', 'POST', '/register', 3, 400, status=302, client='anonymous',
+          data={'name': 'Form User', 'username': 'form-{serial}', 'email': 'form-{serial}@example.com',
+                'password': PASSWORD,
+                'confirm_password': PASSWORD}),
+    Route('auth.logout', 'GET', '/logout', 1, 30, status=302, client='fresh'),
+    Route('auth.api_login', 'POST', '/api/auth/login', 1, 300, client='anonymous',
+          json={'username': 'bench', 'password': PASSWORD}),
+    Route('auth.api_register', 'POST', '/api/auth/register', 3, 300, status=201, client='anonymous',
+          json={'username': 'api-{serial}', 'name': 'Api User', 'password': PASSWORD}),
+    Route('auth.api_logout', 'POST', '/api/auth/logout', 1, 30, client='fresh'),
+    Route('auth.api_user', 'GET', '/api/auth/user', 0, 20),
+
+    # exercises
+    Route('exercises.exercise_list', 'GET', '/exercises', 0, 30),
+    Route('exercises.exercise_detail', 'GET', '/exercises/{exercise}', 0, 30),
+    Route('exercises.api_exercises_list', 'GET', '/api/exercises', 0, 30),
+    Route('exercises.api_search_exercises', 'GET', '/api/exercises/search?q=press', 3, 20),
+    Route('exercises.api_exercise_detail', 'GET', '/api/exercises/{exercise}', 0, 20),
+    Route('exercises.api_create_exercise', 'POST', '/api/exercises', 2, 30, status=201,
+          json={'name': 'Bench Exercise {serial}', 'muscleGroups': 'chest', 'equipment': 'barbell'}),
+    Route('exercises.api_update_exercise', 'PUT', '/api/exercises/{new_exercise}', 3, 30,
+          json={'description': 'Updated'}),
+    Route('exercises.api_update_exercise', 'PATCH', '/api/exercises/{new_exercise}', 3, 30,
+          json={'difficulty': 'advanced'}),
+    Route('exercises.api_delete_exercise', 'DELETE', '/api/exercises/{new_exercise}', 4, 60),
+
+    # workouts
+    Route('workouts.workout_list', 'GET', '/workouts', 3, 800),
+    Route('workouts.create_workout', 'GET', '/workouts/create', 1, 100),
+    Route('workouts.create_workout', 'POST', '/workouts/create', 10, 200, status=302,
+          data={'name': 'Form Workout', 'date': TODAY, 'duration': '45', 'type': 'strength',
+                'exercises-0-exercise_id': '1', 'exercises-0-sets': '3', 'exercises-0-reps': '10'}),
+    Route('workouts.workout_detail', 'GET', '/workouts/{workout}', 2, 60),
+    Route('workouts.edit_workout', 'GET', '/workouts/{workout}/edit', 2, 30),
+    Route('workouts.edit_workout', 'POST', '/workouts/{new_workout}/edit', 9, 80, status=302,
+          data={'name': 'Renamed Workout', 'date': TODAY, 'duration': '50', 'type': 'cardio'}),
+    Route('workouts.api_workouts_list', 'GET', '/api/workouts', 1, 20),
+    Route('workouts.api_workouts_list', 'GET', '/api/workouts?limit=100&fields=id,name,date', 1, 20),
+    Route('workouts.api_user_workouts', 'GET', '/api/users/{user}/workouts', 1, 20),
+    Route('workouts.api_workout_detail', 'GET', '/api/workouts/{workout}', 1, 20),
+    Route('workouts.api_create_workout', 'POST', '/api/workouts', 11, 120, status=201,
+          json={'name': 'Api Workout', 'date': TODAY, 'duration': 30, 'exercises': [
+              {'exerciseId': 1, 'sets': 3, 'reps': 8, 'weight': 60.0},
+              {'exerciseId': 2, 'sets': 3, 'reps': 8, 'weight': 40.0}]}),
+    Route('workouts.api_import_workouts', 'POST', '/api/workouts/import', 30, 100,
+          data=''.join(
+              f'{{"name": "Imported {n}", "date": "{TODAY}", "exercises": [{{"exerciseId": 1, "sets": 3}}]}}\n'
+              for n in range(20)).encode()),
+    Route('workouts.api_update_workout', 'PUT', '/api/workouts/{new_workout}', 9, 80,
+          json={'name': 'Updated Workout', 'duration': 60}),
+    Route('workouts.api_update_workout', 'PATCH', '/api/workouts/{new_workout}', 9, 80,
+          json={'caloriesBurned': 500}),
+    Route('workouts.api_delete_workout', 'DELETE', '/api/workouts/{new_workout}', 12, 150),
+    Route('workouts.api_workout_exercises', 'GET', '/api/workouts/{workout}/exercises', 2, 20),
+    Route('workouts.api_batch_workout_exercises', 'PATCH', '/api/workouts/{new_workout}/exercises', 10, 80,
+          json={'operations': [{'op': 'update', 'id': '{new_workout_exercise}', 'sets': 5}]}),
+    Route('workouts.api_create_workout_exercise', 'POST', '/api/workout-exercises', 8, 100, status=201,
+          json={'workoutId': '{workout}', 'exerciseId': 3, 'sets': 3, 'reps': 12}),
+    Route('workouts.api_update_workout_exercise', 'PUT', '/api/workout-exercises/{new_workout_exercise}', 9, 100,
+          json={'sets': 4, 'reps': 6}),
+    Route('workouts.api_update_workout_exercise', 'PATCH', '/api/workout-exercises/{new_workout_exercise}', 9, 100,
+          json={'weight': 72.5}),
+    Route('workouts.api_delete_workout_exercise', 'DELETE', '/api/workout-exercises/{new_workout_exercise}', 8, 100),
+
+    # goals
+    Route('goals.goal_list', 'GET', '/goals', 1, 60),
+    Route('goals.create_goal', 'GET', '/goals/create', 0, 100),
+    Route('goals.create_goal', 'POST', '/goals/create', 5, 160, status=302,
+          data={'name': 'Form Goal', 'type': 'cardio', 'metric': 'workout_count', 'target_value': '50',
+                'unit': 'workouts', 'start_date': TODAY}),
+    Route('goals.edit_goal', 'GET', '/goals/{goal}/edit', 2, 30),
+    Route('goals.edit_goal', 'POST', '/goals/{new_goal}/edit', 6, 40, status=302,
+          data={'name': 'Edited Goal', 'type': 'other', 'metric': 'total_minutes', 'target_value': '600',
+                'unit': 'minutes', 'start_date': TODAY}),
+    Route('goals.toggle_goal_completion', 'POST', '/goals/{new_goal}/toggle', 3, 20, status=302),
+    Route('goals.api_goals_list', 'GET', '/api/goals', 1, 30),
+    Route('goals.api_user_goals', 'GET', '/api/users/{user}/goals', 1, 30),
+    Route('goals.api_goal_detail', 'GET', '/api/goals/{goal}', 1, 20),
+    Route('goals.api_create_goal', 'POST', '/api/goals', 5, 40, status=201,
+          json={'name': 'Api Goal', 'type': 'strength', 'metric': 'max_weight', 'exerciseId': 1,
+                'targetValue': 140, 'unit': 'kg', 'startDate': TODAY}),
+    Route('goals.api_update_goal', 'PUT', '/api/goals/{new_goal}', 7, 40,
+          json={'targetValue': 200, 'metric': 'workout_count'}),
+    Route('goals.api_update_goal', 'PATCH', '/api/goals/{new_goal}', 4, 40,
+          json={'currentValue': 12}),
+    Route('goals.api_delete_goal', 'DELETE', '/api/goals/{new_goal}', 3, 20),
+]
+
+# Routes that cannot render yet, with the reason; they count as covered but are not run
+SKIPPED = {
+    ('goals.edit_goal', 'GET'): 'goals/edit.html links to a goals.delete_goal endpoint that does not exist',
+    ('workouts.edit_workout', 'GET'): 'there is no workouts/edit.html template',
+}
+
+
+class Fixtures:
+    """
+    Values for the {names} in a route's url and body. Names starting with new_ create
+    a fresh object the first time they are looked up in a run; the rest are fixed.
+    """
+
+    serials = itertools.count(1)
+
+    def __init__(self, client, fixed):
+        self.client = client
+        self.values = dict(fixed, serial=next(self.serials))
+
+    def __getitem__(self, name):
+        if name not in self.values:
+            self.values[name] = getattr(self, f'make_{name}')()
+        return self.values[name]
+
+    def make_new_workout(self):
+        return create_workout(self.client, 3)
+
+    def make_new_workout_exercise(self):
+        response = self.client.get(f'/api/workouts/{self["new_workout"]}/exercises')
+        return response.get_json()[0]['id']
+
+    def make_new_goal(self):
+        response = self.client.post('/api/goals', json={
+            'name': 'Scratch Goal', 'type': 'other', 'targetValue': 10, 'unit': 'units'
+        })
+        return response.get_json()['id']
+
+    def make_new_exercise(self):
+        response = self.client.post('/api/exercises', json={'name': f'Scratch Exercise {self["serial"]}'})
+        return response.get_json()['id']
+
+    def fill(self, value):
+        """
+        Substitute fixtures into a url or body; a string that is exactly one {name} becomes its value
+        """
+        if isinstance(value, dict):
+            return {key: self.fill(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [self.fill(item) for item in value]
+        if isinstance(value, str):
+            fields = [name for _, name, _, _ in string.Formatter().parse(value) if name]
+            if fields == [value[1:-1]] and value.startswith('{'):
+                return self[fields[0]]
+            return value.format_map(self) if fields else value
+        return value
+
+
+def make_users(count):
+    """
+    Insert `count` users sharing one password hash; returns their ids
+    """
+    password_hash = hash_password(PASSWORD)
+    db.session.execute(db.insert(User), [
+        {'username': f'synthetic-{n}', 'name': f'Synthetic {n}', 'password_hash': password_hash}
+        for n in range(count)
+    ])
+    db.session.commit()
+    return db.session.scalars(db.select(User.id).where(User.username.like('synthetic-%'))).all()
+
+
+def check_coverage(app):
+    """
+    (endpoint, method) pairs of the benchmarked blueprints with no entry in ROUTES or SKIPPED
+    """
+    covered = {(route.endpoint, route.method) for route in ROUTES} | set(SKIPPED)
+    missing = []
+    for rule in app.url_map.iter_rules():
+        if rule.endpoint.split('.')[0] not in BLUEPRINTS:
+            continue
+        for method in sorted(rule.methods - {'HEAD', 'OPTIONS'}):
+            if (rule.endpoint, method) not in covered:
+                missing.append((rule.endpoint, method))
+    return missing
+
+
+def measure(app, client, route, fixed, runs):
+    """
+    (highest query count, p95 latency in ms, unexpected status or None) over `runs` requests
+    """
+    queries, latencies, bad_status = [], [], None
+    for _ in range(runs):
+        if route.client == 'anonymous':
+            client = app.test_client()
+        elif route.client == 'fresh':
+            client = login_client(app, username=f'fresh-{next(Fixtures.serials)}', password=PASSWORD)
+        fixtures = Fixtures(client, fixed)
+        url = fixtures.fill(route.url)
+        kwargs = {'json': fixtures.fill(route.json)} if route.json is not None else {}
+        if route.data is not None:
+            kwargs['data'] = fixtures.fill(route.data)
+
+        with count_queries(app) as counter:
+            start = time.perf_counter()
+            try:
+                response = client.open(url, method=route.method, buffered=True, **kwargs)
+            except Exception as e:
+                # TESTING propagates view errors; report them like any other bad status
+                return counter.count, 0.0, f'{type(e).__name__}: {e}'
+            latencies.append(time.perf_counter() - start)
+        response.close()
+        queries.append(counter.count)
+        if response.status_code != route.status:
+            bad_status = response.status_code
+    latencies.sort()
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000
+    return max(queries), p95, bad_status
+
+
+def main():
+    workouts = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    users = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    runs = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+
+    app = make_app(EndpointConfig)
+    client = login_client(app, password=PASSWORD)
+    with app.app_context():
+        user_id = db.session.scalar(db.select(User.id).where(User.username == 'bench'))
+        user_ids = [user_id] + make_users(users - 1)
+        start = time.perf_counter()
+        counts = populate_history(user_ids, workouts)
+        print(f'{len(user_ids)} users, {counts["workouts"]} workouts, '
+              f'{counts["workout_exercises"]} workout exercises, {counts["goals"]} goals '
+              f'generated in {time.perf_counter() - start:.1f}s')
+    fixed = {
+        'user': user_id,
+        'workout': client.get('/api/workouts?limit=1').get_json()[0]['id'],
+        'goal': client.get('/api/goals').get_json()[0]['id'],
+        'exercise': 1,
+    }
+    # Keep the setup's objects out of later collections, whose pauses would land on whichever run triggers them
+    gc.collect()
+    gc.freeze()
+
+    failures = [f'{endpoint} {method}: no entry in ROUTES' for endpoint, method in check_coverage(app)]
+    for route in ROUTES:
+        label = f'{route.method:6} {route.endpoint}'
+        reason = SKIPPED.get((route.endpoint, route.method))
+        if reason:
+            print(f'{label:52} skipped: {reason}')
+            continue
+        queries, p95, bad_status = measure(app, client, route, fixed, runs)
+        problems = []
+        if bad_status is not None:
+            problems.append(f'status {bad_status}, expected {route.status}')
+        if queries > route.max_queries:
+            problems.append(f'{queries} queries > {route.max_queries}')
+        if p95 > route.p95_ms:
+            problems.append(f'p95 {p95:.1f} ms > {route.p95_ms} ms')
+        print(f'{label:52} {queries:3} queries  p95 {p95:7.1f} ms  {"; ".join(problems) or "OK"}')
+        failures.extend(f'{label}: {problem}' for problem in problems)
+
+    if failures:
+        print(f'\n{len(failures)} budget failures:')
+        for failure in failures:
+            print(f'  {failure}')
+    raise SystemExit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
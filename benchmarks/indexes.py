@@ -0,0 +1,101 @@
+"""
+Checks with EXPLAIN that the per-user and per-workout access paths are served by
+indexes rather than table scans or sorts.
+
+    python -m benchmarks.indexes [workouts]
+
+Runs against a temporary SQLite database (EXPLAIN QUERY PLAN), or against
+BENCHMARK_DATABASE_URL when set (PostgreSQL EXPLAIN with sequential scans disabled,
+so the check does not depend on table sizes). Exits non-zero when a query plan scans
+one of the checked tables or sorts in a temporary B-tree.
+"""
+import os
+import sys
+
+from benchmarks.common import BenchmarkConfig, make_app, login_client, populate_history
+from app import create_app, db
+from app.models.goal import Goal
+from app.models.stats import DailyStats
+from app.models.user import User
+from app.models.workout import Workout, WorkoutExercise
+from app.utils.database import init_database
+
+TABLES = ('workouts', 'workout_exercises', 'goals', 'daily_stats')
+
+QUERIES = {
+    "a user's workouts, newest first": lambda: db.select(Workout)
+        .where(Workout.user_id == 1, Workout.date.isnot(None)).order_by(Workout.date.desc(), Workout.id).limit(20),
+    "a user's undated workouts": lambda: db.select(Workout)
+        .where(Workout.user_id == 1, Workout.date.is_(None)).order_by(Workout.id).limit(20),
+    "a user's workout count": lambda: db.select(db.func.count(Workout.id)).where(Workout.user_id == 1),
+    "a workout's exercises in order": lambda: db.select(WorkoutExercise)
+        .where(WorkoutExercise.workout_id == 1).order_by(WorkoutExercise.order, WorkoutExercise.id),
+    'workout exercises of an exercise': lambda: db.select(WorkoutExercise.id)
+        .where(WorkoutExercise.exercise_id == 1),
+    "a user's goals": lambda: db.select(Goal).where(Goal.user_id == 1),
+    "a user's active goals": lambda: db.select(Goal).where(Goal.user_id == 1, Goal.completed == False),
+    "a user's completed goal count": lambda: db.select(db.func.count(Goal.id))
+        .where(Goal.user_id == 1, Goal.completed == True),
+    "a user's daily stats for a range": lambda: db.select(DailyStats)
+        .where(DailyStats.user_id == 1, DailyStats.date >= '2024-01-01'),
+}
+
+
+def explain(query):
+    """
+    The plan lines for a query, with parameters inlined
+    """
+    dialect = db.engine.dialect
+    sql = str(query.compile(dialect=dialect, compile_kwargs={'literal_binds': True}))
+    if dialect.name == 'sqlite':
+        return [row.detail for row in db.session.execute(db.text(f'EXPLAIN QUERY PLAN {sql}'))]
+    db.session.execute(db.text('SET LOCAL enable_seqscan = off'))
+    return [row[0] for row in db.session.execute(db.text(f'EXPLAIN {sql}'))]
+
+
+def problems(plan):
+    found = []
+    for line in plan:
+        for table in TABLES:
+            # SQLite: "SCAN goals" (a covering index scan names the index); PostgreSQL: "Seq Scan on goals"
+            if line == f'SCAN {table}' or f'Seq Scan on {table}' in line:
+                found.append(f'scans {table}')
+        if 'USE TEMP B-TREE' in line:
+            found.append('sorts in a temporary B-tree')
+    return found
+
+
+def main():
+    workouts = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+
+    url = os.environ.get('BENCHMARK_DATABASE_URL')
+    if url:
+        class UrlConfig(BenchmarkConfig):
+            SQLALCHEMY_DATABASE_URI = url
+        app = create_app(UrlConfig)
+        with app.app_context():
+            init_database()
+    else:
+        app = make_app()
+    login_client(app, username='explain')
+
+    failed = False
+    with app.app_context():
+        user_id = db.session.scalar(db.select(User.id).where(User.username == 'explain'))
+        if not db.session.scalar(db.select(db.func.count(Workout.id)).where(Workout.user_id == user_id)):
+            populate_history([user_id], workouts)
+        print(db.engine.dialect.name)
+        for name, query in QUERIES.items():
+            plan = explain(query())
+            found = problems(plan)
+            failed = failed or bool(found)
+            print(f'{name:36} {"; ".join(found) or "OK"}')
+            for line in plan:
+                print(f'    {line}')
+        db.session.rollback()
+
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
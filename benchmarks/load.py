@@ -0,0 +1,148 @@
+"""
+Throughput of the production profile under gunicorn with 1..N sync workers.
+
+    python -m benchmarks.load [max workers] [seconds per run] [client threads]
+
+Serves run:app with FITTRACK_CONFIG=production against a temporary SQLite database
+(WAL pragmas), or against BENCHMARK_DATABASE_URL when set. Clients replay a mix
+of logged-in read requests with the session cookie of a pre-registered user.
+"""
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from collections import Counter
+
+from benchmarks.common import create_workout, login_client
+from config import ProductionConfig
+from app import create_app
+from app.utils.database import init_database
+
+ENDPOINTS = [
+    '/',
+    '/api/workouts',
+    '/api/exercises',
+    '/api/goals',
+    '/api/analytics/trends?bucket=week',
+]
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def prepare(url):
+    """
+    Create the schema and a user with some history; returns the user's session cookie
+    """
+    class LoadConfig(ProductionConfig):
+        SQLALCHEMY_DATABASE_URI = url
+        WTF_CSRF_ENABLED = False
+
+    app = create_app(LoadConfig)
+    with app.app_context():
+        init_database()
+    client = login_client(app, username='load')
+    for days_ago in range(60):
+        create_workout(client, 5, days_ago=days_ago)
+    return client.get_cookie('session').value
+
+
+def wait_until_up(port, process, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError('gunicorn exited during startup')
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.2):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError('gunicorn did not start')
+
+
+def hammer(port, cookie, seconds, threads):
+    statuses = Counter()
+    latencies = []
+    lock = threading.Lock()
+    deadline = time.monotonic() + seconds
+
+    def client(offset):
+        i = offset
+        while time.monotonic() < deadline:
+            request = urllib.request.Request(
+                f'http://127.0.0.1:{port}{ENDPOINTS[i % len(ENDPOINTS)]}',
+                headers={'Cookie': f'session={cookie}'}
+            )
+            start = time.perf_counter()
+            try:
+                with urllib.request.urlopen(request, timeout=30) as response:
+                    response.read()
+                    status = response.status
+            except urllib.error.HTTPError as e:
+                status = e.code
+            except OSError:
+                status = 'error'
+            elapsed = time.perf_counter() - start
+            with lock:
+                statuses[status] += 1
+                latencies.append(elapsed)
+            i += 1
+
+    workers = [threading.Thread(target=client, args=(n,)) for n in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    latencies.sort()
+    return statuses, latencies
+
+
+def main():
+    max_workers = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 10
+    threads = int(sys.argv[3]) if len(sys.argv) > 3 else 16
+
+    url = os.environ.get('BENCHMARK_DATABASE_URL')
+    if not url:
+        handle, path = tempfile.mkstemp(prefix='fittrack-load-', suffix='.db')
+        os.close(handle)
+        url = f'sqlite:///{path}'
+    cookie = prepare(url)
+
+    env = dict(os.environ, DATABASE_URL=url, FITTRACK_CONFIG='production')
+    print(f'{url.split(":")[0]}, {threads} client threads, {seconds:.0f}s per run')
+    workers = 1
+    while workers <= max_workers:
+        port = free_port()
+        process = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '--workers', str(workers),
+             '--bind', f'127.0.0.1:{port}', '--log-level', 'warning', 'run:app'],
+            cwd=ROOT, env=env
+        )
+        try:
+            wait_until_up(port, process)
+            hammer(port, cookie, 1, threads)  # warm every worker's caches
+            statuses, latencies = hammer(port, cookie, seconds, threads)
+        finally:
+            process.terminate()
+            process.wait()
+        total = len(latencies)
+        print(f'{workers:2} workers  {total / seconds:8.1f} req/s  '
+              f'p50 {latencies[total // 2] * 1000:6.1f} ms  '
+              f'p95 {latencies[int(total * 0.95)] * 1000:6.1f} ms  {dict(statuses)}')
+        workers *= 2
+
+    if not os.environ.get('BENCHMARK_DATABASE_URL'):
+        os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
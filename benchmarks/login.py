@@ -0,0 +1,77 @@
+"""
+Login throughput for a few hashing parameters, and how a burst of logins affects
+the latency of regular requests with verification inline vs in a process pool.
+
+    python -m benchmarks.login [concurrent logins] [seconds]
+"""
+import sys
+import threading
+import time
+
+from benchmarks.common import BenchmarkConfig, make_app, login_client
+
+METHODS = ['scrypt:32768:8:1', 'scrypt:16384:8:1', 'pbkdf2:sha256:600000', 'pbkdf2:sha256:100000']
+
+
+def burst(app, threads, seconds, probe=None):
+    """
+    Hammer /api/auth/login from several threads; meanwhile time a cheap GET if given
+    """
+    deadline = time.monotonic() + seconds
+    counts = {'ok': 0, 'busy': 0}
+    lock = threading.Lock()
+
+    def login():
+        client = app.test_client()
+        while time.monotonic() < deadline:
+            response = client.post('/api/auth/login', json={'username': 'bench', 'password': 'benchmark'})
+            with lock:
+                counts['ok' if response.status_code == 200 else 'busy'] += 1
+
+    workers = [threading.Thread(target=login) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    latencies = []
+    while probe and time.monotonic() < deadline:
+        start = time.perf_counter()
+        probe.get('/api/exercises')
+        latencies.append(time.perf_counter() - start)
+        time.sleep(0.01)
+    for worker in workers:
+        worker.join()
+    latencies.sort()
+    return counts, latencies
+
+
+def main():
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    print('Login throughput by hashing parameters (inline verification):')
+    for method in METHODS:
+        class MethodConfig(BenchmarkConfig):
+            PASSWORD_HASH_METHOD = method
+        app = make_app(MethodConfig)
+        login_client(app)
+        counts, _ = burst(app, threads, seconds)
+        print(f'  {method:24} {counts["ok"] / seconds:7.1f} logins/s')
+
+    print(f'Latency of GET /api/exercises during a burst of {threads} concurrent logins:')
+    for workers in (0, 1):
+        class PoolConfig(BenchmarkConfig):
+            PASSWORD_VERIFY_WORKERS = workers
+        app = make_app(PoolConfig)
+        probe = login_client(app)
+        probe.post('/api/auth/login', json={'username': 'bench', 'password': 'benchmark'})  # start the pool
+        probe.get('/api/exercises')
+        counts, latencies = burst(app, threads, seconds, probe)
+        label = 'inline' if not workers else f'pool of {workers}'
+        print(f'  {label:10} {counts["ok"] / seconds:6.1f} logins/s, {counts["busy"]} rejected as busy; '
+              f'probe p50 {latencies[len(latencies) // 2] * 1000:6.1f} ms, '
+              f'p95 {latencies[int(len(latencies) * 0.95)] * 1000:6.1f} ms')
+        from app.utils.passwords import password_verifier
+        password_verifier.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,38 @@
+"""
+Checks that the workout detail endpoints issue a constant number of queries
+regardless of how many exercises a workout holds.
+
+    python -m benchmarks.query_counts
+"""
+from benchmarks.common import make_app, login_client, create_workout, count_queries
+
+EXERCISE_COUNTS = [1, 5, 25, 100]
+
+ENDPOINTS = [
+    '/api/workouts/{id}/exercises',
+    '/workouts/{id}',
+]
+
+
+def main():
+    app = make_app()
+    client = login_client(app)
+    workout_ids = {n: create_workout(client, n, days_ago=i) for i, n in enumerate(EXERCISE_COUNTS)}
+
+    failed = False
+    for endpoint in ENDPOINTS:
+        counts = []
+        for n, workout_id in workout_ids.items():
+            with count_queries(app) as counter:
+                response = client.get(endpoint.format(id=workout_id))
+            assert response.status_code == 200, response.status_code
+            counts.append(counter.count)
+        constant = len(set(counts)) == 1
+        failed = failed or not constant
+        print(f'{endpoint:35} queries per request {counts} {"OK" if constant else "NOT CONSTANT"}')
+
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
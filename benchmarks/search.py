@@ -0,0 +1,69 @@
+"""
+Exercise search latency on a large synthetic catalog, for each search backend.
+
+    python -m benchmarks.search [exercise_count]
+"""
+import random
+import sys
+import time
+
+from benchmarks.common import BenchmarkConfig, make_app
+from app import db
+from app.models.exercise import Exercise
+from app.utils.catalog import exercise_catalog
+from app.utils.search import exercise_search
+
+WORDS = ('press row curl squat lunge plank raise pull push fly dip thrust bridge swing carry '
+         'kettlebell barbell dumbbell cable band incline decline seated standing single arm leg').split()
+MUSCLES = ['Chest', 'Back', 'Shoulders', 'Biceps', 'Triceps', 'Core', 'Glutes', 'Quadriceps', 'Hamstrings', 'Calves']
+QUERIES = ['press', 'barbell squat', 'sin', 'back row', 'kettlebell swing glutes', 'zzz']
+
+
+def populate(count, seed=7):
+    rng = random.Random(seed)
+    # Common movement words plus a long tail of rarer terms, like a real catalog
+    vocabulary = WORDS + [''.join(rng.choices('abcdefghijklmnopqrstuvwxyz', k=rng.randint(4, 9))) for _ in range(20_000)]
+    rows = [{
+        'name': ' '.join([rng.choice(WORDS)] + rng.sample(vocabulary, 2)).title(),
+        'description': ' '.join(rng.choices(vocabulary, k=12)),
+        'instructions': ' '.join(rng.choices(vocabulary, k=20)),
+        'muscle_groups': ', '.join(rng.sample(MUSCLES, 2)),
+        'difficulty': rng.choice(['Beginner', 'Intermediate', 'Advanced']),
+    } for _ in range(count)]
+    db.session.execute(db.insert(Exercise), rows)
+    db.session.commit()
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+
+    for backend in ('fts5', 'bm25'):
+        class Config(BenchmarkConfig):
+            EXERCISE_SEARCH_BACKEND = backend
+
+        app = make_app(Config)
+        with app.app_context():
+            populate(count)
+            start = time.perf_counter()
+            exercise_search.search('warmup')
+            print(f'{backend}: first query (index build / cache fill) {(time.perf_counter() - start) * 1000:.0f} ms')
+
+            for query in QUERIES:
+                runs = []
+                for _ in range(20):
+                    start = time.perf_counter()
+                    total, _ = exercise_search.search(query, page=1, per_page=20)
+                    runs.append(time.perf_counter() - start)
+                runs.sort()
+                print(f'{backend}: {query!r:28} {total:7} matches  median {runs[10] * 1000:7.2f} ms')
+
+            # bm25 keeps serving its old index while the catalog reloads in the background
+            populate(count // 100, seed=8)
+            exercise_catalog.invalidate()
+            start = time.perf_counter()
+            exercise_search.search('press')
+            print(f'{backend}: first query after a catalog change {(time.perf_counter() - start) * 1000:.0f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+App startup latency: import of the app package through create_app() returning,
+measured in fresh interpreters, plus the SQL statements issued while starting.
+Exits non-zero when the cold-start budget is exceeded.
+
+    python -m benchmarks.startup [runs]
+
+Budgets (env): STARTUP_BUDGET_MS for the median import-to-ready time,
+STARTUP_APP_IMPORT_BUDGET_MS for time spent importing the app's own modules.
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from app.utils.profiling import profile_startup, own_time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BUDGET_MS = float(os.environ.get('STARTUP_BUDGET_MS', 1500))
+APP_IMPORT_BUDGET_MS = float(os.environ.get('STARTUP_APP_IMPORT_BUDGET_MS', 100))
+
+PROBE = """
+import json, time
+start = time.perf_counter()
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+statements = []
+event.listen(Engine, 'before_cursor_execute', lambda *args: statements.append(args[2]))
+from app import create_app
+from config import configs
+app = create_app(configs['production'])
+print(json.dumps({'ms': (time.perf_counter() - start) * 1000, 'statements': statements}))
+"""
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    handle, path = tempfile.mkstemp(prefix='fittrack-startup-', suffix='.db')
+    os.close(handle)
+    env = dict(os.environ, DATABASE_URL=f'sqlite:///{path}')
+    try:
+        subprocess.run([sys.executable, '-m', 'flask', '--app', 'run', 'init-db'],
+                       cwd=ROOT, env=env, check=True, capture_output=True)
+        results = []
+        for _ in range(runs):
+            output = subprocess.run([sys.executable, '-c', PROBE], cwd=ROOT, env=env,
+                                    check=True, capture_output=True, text=True).stdout
+            results.append(json.loads(output.strip().splitlines()[-1]))
+        app_import_ms = min(own_time(profile_startup(env=env)) for _ in range(3)) / 1000
+    finally:
+        os.remove(path)
+
+    times = sorted(result['ms'] for result in results)
+    print(f'create_app() import-to-ready over {runs} runs: '
+          f'median {statistics.median(times):.0f} ms, min {times[0]:.0f} ms, max {times[-1]:.0f} ms')
+    print(f'SQL statements during startup: {len(results[-1]["statements"])}')
+    for statement in results[-1]['statements']:
+        print('  ' + ' '.join(statement.split())[:100])
+    print(f'Importing app modules: {app_import_ms:.0f} ms')
+
+    failures = []
+    if statistics.median(times) > BUDGET_MS:
+        failures.append(f'median startup {statistics.median(times):.0f} ms > budget {BUDGET_MS:.0f} ms')
+    if app_import_ms > APP_IMPORT_BUDGET_MS:
+        failures.append(f'app imports {app_import_ms:.0f} ms > budget {APP_IMPORT_BUDGET_MS:.0f} ms')
+    if results[-1]['statements']:
+        failures.append('create_app() must not issue SQL')
+    for failure in failures:
+        print('OVER BUDGET: ' + failure)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+"""
+Queries and latency of cheap authenticated endpoints with the Flask-Login user
+cache disabled (USER_CACHE_TTL = 0) and enabled, plus the cache hit rate.
+
+    python -m benchmarks.user_cache [requests]
+"""
+import sys
+import time
+
+from benchmarks.common import BenchmarkConfig, make_app, login_client, count_queries
+from app.models.user import user_cache
+
+ENDPOINTS = ['/api/auth/user', '/api/goals', '/api/workouts?limit=1']
+
+
+def run(config_class, requests):
+    app = make_app(config_class)
+    client = login_client(app)
+    user_cache.clear()
+    with count_queries(app) as counter:
+        start = time.perf_counter()
+        for i in range(requests):
+            assert client.get(ENDPOINTS[i % len(ENDPOINTS)]).status_code == 200
+        elapsed = time.perf_counter() - start
+    return counter.count / requests, elapsed / requests * 1000, user_cache.stats()
+
+
+def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 600
+
+    class Uncached(BenchmarkConfig):
+        USER_CACHE_TTL = 0
+
+    for label, config_class in (('no user cache', Uncached), ('user cache', BenchmarkConfig)):
+        queries, latency, stats = run(config_class, requests)
+        hit_rate = f"{stats['hitRate']:.1%}" if stats['hitRate'] is not None else '-'
+        print(f'{label:14} {queries:5.2f} queries/request  {latency:6.2f} ms/request  hit rate {hit_rate}')
+
+
+if __name__ == '__main__':
+    main()
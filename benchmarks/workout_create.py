@@ -0,0 +1,76 @@
+"""
+Workout creation throughput: the old path (commit the workout, then add and commit
+its exercises) against save_workout (one transaction, exercises in one executemany).
+
+    python -m benchmarks.workout_create [workouts] [exercises per workout]
+
+Runs against a temporary SQLite database, or against DATABASE_URL when
+BENCHMARK_DATABASE_URL is set (e.g. a scratch PostgreSQL database).
+"""
+import os
+import sys
+import time
+from datetime import date
+
+from benchmarks.common import BenchmarkConfig, make_app
+from app import create_app, db
+from app.utils.database import init_database
+from app.models.user import User
+from app.models.workout import Workout, WorkoutExercise
+from app.routes.workouts import save_workout
+
+
+def exercise_rows(count):
+    return [
+        dict(exercise_id=(i % 8) + 1, sets=3, reps=10, weight=40.0, order=i)
+        for i in range(count)
+    ]
+
+
+def create_separately(user_id, rows):
+    workout = Workout(user_id=user_id, name='Bench', date=date.today(), duration=45)
+    db.session.add(workout)
+    db.session.commit()
+    for row in rows:
+        db.session.add(WorkoutExercise(workout_id=workout.id, **row))
+    db.session.commit()
+
+
+def create_together(user_id, rows):
+    save_workout(Workout(user_id=user_id, name='Bench', date=date.today(), duration=45), rows)
+
+
+def main():
+    workouts = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    per_workout = int(sys.argv[2]) if len(sys.argv) > 2 else 6
+
+    url = os.environ.get('BENCHMARK_DATABASE_URL')
+    if url:
+        class UrlConfig(BenchmarkConfig):
+            SQLALCHEMY_DATABASE_URI = url
+        app = create_app(UrlConfig)
+        with app.app_context():
+            init_database()
+    else:
+        app = make_app()
+
+    with app.app_context():
+        print(f'{db.engine.dialect.name}: {workouts} workouts x {per_workout} exercises')
+        user = User(username='bench-create', name='Bench', password='benchmark')
+        db.session.add(user)
+        db.session.commit()
+        rows = exercise_rows(per_workout)
+
+        for label, create in (('separate commits', create_separately), ('one transaction', create_together)):
+            start = time.perf_counter()
+            for _ in range(workouts):
+                create(user.id, rows)
+            elapsed = time.perf_counter() - start
+            print(f'{label:18} {workouts / elapsed:8.0f} workouts/s')
+
+        db.session.delete(user)
+        db.session.commit()
+
+
+if __name__ == '__main__':
+    main()
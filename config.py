@@ -1,9 +1,91 @@
 import os
+import tempfile
 from dotenv import load_dotenv
 
 load_dotenv()
 
+def engine_options(uri):
+    """
+    SQLALCHEMY_ENGINE_OPTIONS for a production database: pool sizing, pre-ping and
+    recycle from the environment, plus a server-side statement timeout on PostgreSQL.
+    Applied by create_app() to the app's final SQLALCHEMY_DATABASE_URI.
+    """
+    if uri.startswith('sqlite') and (uri in ('sqlite://', 'sqlite:///') or ':memory:' in uri):
+        # In-memory SQLite gets a single-connection pool that takes no sizing options
+        return {}
+    options = {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 5)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 10)),
+        'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT', 30)),
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 1800)),
+        'pool_pre_ping': os.environ.get('DB_POOL_PRE_PING', '1') != '0',
+    }
+    if uri.startswith('postgres'):
+        timeout = int(os.environ.get('DB_STATEMENT_TIMEOUT_MS', 30000))
+        options['connect_args'] = {'options': f'-c statement_timeout={timeout}'}
+    return options
+
 class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-key-for-development'
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///fittrack.db'
-    SQLALCHEMY_TRACK_MODIFICATIONS = False
\ No newline at end of file
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    
+    # Pragmas set on every new SQLite connection: WAL lets readers run alongside a
+    # writer, NORMAL sync is safe under WAL, and writers wait instead of failing
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000)),
+    }
+    
+    # Password hashing (werkzeug method spec). Hashes made with other parameters
+    # are upgraded on the user's next successful login.
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD') or 'scrypt:32768:8:1'
+    PASSWORD_SALT_LENGTH = int(os.environ.get('PASSWORD_SALT_LENGTH', 16))
+    # Verify passwords in a pool of this many processes (0 = inline in the request),
+    # with at most PASSWORD_VERIFY_MAX_PENDING (default 4 x workers) waiting for it
+    PASSWORD_VERIFY_WORKERS = int(os.environ.get('PASSWORD_VERIFY_WORKERS', 0))
+    PASSWORD_VERIFY_MAX_PENDING = int(os.environ.get('PASSWORD_VERIFY_MAX_PENDING', 0))
+    PASSWORD_VERIFY_TIMEOUT = int(os.environ.get('PASSWORD_VERIFY_TIMEOUT', 10))
+    
+    # Request instrumentation: per-process metrics at /metrics, and warnings for
+    # requests / SQL statements slower than these thresholds (0 = off)
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1') != '0'
+    # /metrics answers requests bearing METRICS_TOKEN or coming from METRICS_ALLOWED_IPS
+    # (comma separated addresses or networks); with neither set it answers no one.
+    # The address checked is the direct peer: behind a reverse proxy on this host every
+    # request comes from 127.0.0.1, so never allow loopback there. X-Forwarded-For is
+    # not consulted unless the app is wrapped in werkzeug's ProxyFix for that proxy.
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN') or None
+    METRICS_ALLOWED_IPS = os.environ.get('METRICS_ALLOWED_IPS', '')
+    SLOW_REQUEST_MS = int(os.environ.get('SLOW_REQUEST_MS', 1000))
+    SLOW_QUERY_MS = int(os.environ.get('SLOW_QUERY_MS', 200))
+    
+    # Pagination for workout list endpoints
+    WORKOUTS_PAGE_SIZE = int(os.environ.get('WORKOUTS_PAGE_SIZE', 50))
+    WORKOUTS_MAX_PAGE_SIZE = int(os.environ.get('WORKOUTS_MAX_PAGE_SIZE', 200))
+    
+    # Exercise catalog cache: 'memory' invalidates a single process and is only safe when
+    # one process serves the app, 'file' shares invalidation between worker processes on
+    # this host through a version stamp file
+    EXERCISE_CACHE_BACKEND = os.environ.get('EXERCISE_CACHE_BACKEND') or 'memory'
+    EXERCISE_CACHE_VERSION_FILE = os.environ.get('EXERCISE_CACHE_VERSION_FILE') or \
+        os.path.join(tempfile.gettempdir(), 'fittrack-exercise-catalog.version')
+    
+    # Exercise search: 'auto' uses SQLite FTS5 when available, else 'bm25' (in-memory index)
+    EXERCISE_SEARCH_BACKEND = os.environ.get('EXERCISE_SEARCH_BACKEND') or 'auto'
+    
+    # Workouts inserted per transaction by the bulk importer
+    IMPORT_BATCH_SIZE = int(os.environ.get('IMPORT_BATCH_SIZE', 500))
+
+class ProductionConfig(Config):
+    # Pool options from engine_options(), for whatever URI the app ends up with
+    PRODUCTION_ENGINE_OPTIONS = True
+    # gunicorn runs several workers (gunicorn.conf.py)
+    EXERCISE_CACHE_BACKEND = os.environ.get('EXERCISE_CACHE_BACKEND') or 'file'
+
+# Selected with the FITTRACK_CONFIG environment variable (see run.py)
+configs = {
+    'development': Config,
+    'production': ProductionConfig,
+}
\ No newline at end of file
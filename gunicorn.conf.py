@@ -0,0 +1,20 @@
+# gunicorn settings, read automatically when gunicorn runs from the project root:
+#   FITTRACK_CONFIG=production gunicorn run:app
+import multiprocessing
+import os
+
+bind = os.environ.get('BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+
+# Import and build the app once in the master; forked workers start with it
+# already loaded instead of each paying the full import cost
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') != '0'
+
+
+def post_fork(server, worker):
+    # create_app() opens no connections, but never share a pool across a fork
+    from app import db
+    from run import app
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
@@ -1,6 +1,12 @@
+import os
 from app import create_app
+from config import configs
 
-app = create_app()
+app = create_app(configs[os.environ.get('FITTRACK_CONFIG', 'development')])
 
 if __name__ == '__main__':
+    # The development server sets up its own database; deployments run `flask init-db`
+    from app.utils.database import init_database
+    with app.app_context():
+        init_database()
     app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file